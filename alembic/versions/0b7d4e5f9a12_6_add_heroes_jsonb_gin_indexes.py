@@ -0,0 +1,40 @@
+"""6-Add heroes jsonb gin indexes
+
+Revision ID: 0b7d4e5f9a12
+Revises: f61a2c9e8b37
+Create Date: 2026-10-18 18:02:33.610847
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7d4e5f9a12"
+down_revision: Union[str, Sequence[str], None] = "f61a2c9e8b37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = ("biography", "appearance", "connections")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # `jsonb_path_ops` поддерживает только `@>`, но индекс меньше и быстрее
+    # индекса `jsonb_ops` по умолчанию
+    for field in FIELDS:
+        op.create_index(
+            op.f(f"heroes_{field}_idx"),
+            "heroes",
+            [field],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={field: "jsonb_path_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for field in FIELDS:
+        op.drop_index(op.f(f"heroes_{field}_idx"), table_name="heroes")
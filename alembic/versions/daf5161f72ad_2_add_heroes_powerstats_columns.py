@@ -0,0 +1,50 @@
+"""2-Add heroes powerstats columns
+
+Revision ID: daf5161f72ad
+Revises: bfcc0c8057fd
+Create Date: 2026-10-18 10:12:41.503418
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "daf5161f72ad"
+down_revision: Union[str, Sequence[str], None] = "bfcc0c8057fd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POWERSTATS = ("intelligence", "strength", "speed", "durability", "power", "combat")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Вычисляемые STORED колонки заполняются для существующих строк
+    # при добавлении колонки, отдельный backfill не требуется.
+    for field in POWERSTATS:
+        op.add_column(
+            "heroes",
+            sa.Column(
+                field,
+                sa.Integer(),
+                sa.Computed(
+                    f"CASE WHEN (powerstats ->> '{field}') ~ '^[0-9]+$' "
+                    f"THEN (powerstats ->> '{field}')::integer END",
+                    persisted=True,
+                ),
+                nullable=True,
+                comment=f"Характеристика `{field}`",
+            ),
+        )
+        op.create_index(op.f(f"heroes_{field}_idx"), "heroes", [field], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for field in POWERSTATS:
+        op.drop_index(op.f(f"heroes_{field}_idx"), table_name="heroes")
+        op.drop_column("heroes", field)
@@ -0,0 +1,38 @@
+"""4-Add heroes powerstats sort indexes
+
+Revision ID: e3b1c7a94d20
+Revises: ca45eb0b28ea
+Create Date: 2026-10-18 16:05:12.274019
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b1c7a94d20"
+down_revision: Union[str, Sequence[str], None] = "ca45eb0b28ea"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POWERSTATS = ("intelligence", "strength", "speed", "durability", "power", "combat")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for field in POWERSTATS:
+        op.create_index(
+            f"heroes_{field}_sort_idx",
+            "heroes",
+            [sa.text(f"coalesce({field}, -1) DESC"), "id"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for field in POWERSTATS:
+        op.drop_index(f"heroes_{field}_sort_idx", table_name="heroes")
@@ -0,0 +1,55 @@
+"""5-Add heroes trigram indexes
+
+Revision ID: f61a2c9e8b37
+Revises: e3b1c7a94d20
+Create Date: 2026-10-18 17:21:48.915302
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f61a2c9e8b37"
+down_revision: Union[str, Sequence[str], None] = "e3b1c7a94d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Расширение входит в contrib и доступно в образе `postgres:16-alpine`
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "heroes_name_trgm_idx",
+        "heroes",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "heroes_full_name_trgm_idx",
+        "heroes",
+        [sa.text("(biography ->> 'full-name') gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "heroes_aliases_trgm_idx",
+        "heroes",
+        [sa.text("(biography ->> 'aliases') gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("heroes_aliases_trgm_idx", table_name="heroes")
+    op.drop_index("heroes_full_name_trgm_idx", table_name="heroes")
+    op.drop_index("heroes_name_trgm_idx", table_name="heroes")
+    # Расширение не удаляется: оно может использоваться другими объектами БД
@@ -0,0 +1,421 @@
+"""
+Нагрузочный тест API героев.
+
+В БД добавляются синтетические герои на основе фикстуры
+`alembic/fixtures/heroes.json`: характеристики варьируются, остальные поля
+копируются, поэтому фильтры по издателю, мировоззрению и расе
+распределены как в фикстуре. После замера герои удаляются.
+
+Сценарии `GET /api/v1/heroes` (фильтры, глубокие смещения, сортировки
+и их смесь) и `POST /api/v1/heroes` к локальному stub SuperHero API
+выполняются в приложении `src.main:app` через ASGI транспорт с заданной
+параллельностью. Для каждого сценария выводятся rps, p50/p95/p99
+и число запросов к БД на HTTP запрос в формате JSON, пригодном
+для сравнения результатов между коммитами.
+
+Пример:
+    python -m benchmarks.load --heroes 100000 --requests 500 --concurrency 10 \\
+        --output bench-100k.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+from aiohttp import web
+from sqlalchemy import event, text
+
+from src.database import EngineLocal
+from src.heroes import service
+from src.main import app
+from src.superhero_api import SuperHeroAPIClient
+
+FIXTURE_PATH = Path(__file__).parents[1] / "alembic" / "fixtures" / "heroes.json"
+# Диапазоны id синтетических героев и героев, созданных через stub
+SEED_FIRST_ID: int = 1_000_000
+UPSTREAM_FIRST_ID: int = 2_000_000
+HEROES_URL: str = "/api/v1/heroes"
+
+SEED_SQL = """
+WITH templates AS (
+    SELECT ordinality - 1 AS k, value AS hero
+    FROM jsonb_array_elements(CAST(:fixture AS jsonb)) WITH ORDINALITY
+)
+INSERT INTO heroes (id, name, powerstats, biography, appearance, work, connections, image)
+SELECT
+    :first_id + i,
+    (t.hero ->> 'name') || ' ' || i,
+    (
+        SELECT jsonb_object_agg(
+            s.key,
+            CASE WHEN s.value ~ '^\\d+$'
+                THEN ((s.value::int + i * 37) % 101)::text
+                ELSE s.value
+            END
+        )
+        FROM jsonb_each_text(CAST(t.hero ->> 'powerstats' AS jsonb)) AS s
+    ),
+    CAST(t.hero ->> 'biography' AS jsonb)
+        || jsonb_build_object('full-name', (t.hero ->> 'name') || ' ' || i),
+    CAST(t.hero ->> 'appearance' AS jsonb),
+    CAST(t.hero ->> 'work' AS jsonb),
+    CAST(t.hero ->> 'connections' AS jsonb),
+    CAST(t.hero ->> 'image' AS jsonb)
+FROM generate_series(0, :heroes - 1) AS i
+JOIN templates AS t ON t.k = i % :templates
+"""
+
+
+def load_fixture() -> list[dict]:
+    with open(FIXTURE_PATH, encoding="utf-8") as file:
+        return json.load(file)["heroes"]
+
+
+# MARK: Seed
+async def seed(heroes: int) -> None:
+    """Добавить синтетических героев и обновить статистику планировщика."""
+
+    fixture = load_fixture()
+    async with EngineLocal.begin() as conn:
+        await conn.execute(
+            text(SEED_SQL),
+            {
+                "fixture": json.dumps(fixture),
+                "first_id": SEED_FIRST_ID,
+                "heroes": heroes,
+                "templates": len(fixture),
+            },
+        )
+    await analyze()
+
+
+async def cleanup() -> None:
+    """Удалить героев, добавленных тестом."""
+
+    async with EngineLocal.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM heroes WHERE id >= :first_id"),
+            {"first_id": SEED_FIRST_ID},
+        )
+    await analyze()
+
+
+async def analyze() -> None:
+    async with EngineLocal.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE heroes"))
+
+
+# MARK: Upstream
+class UpstreamStub:
+    """
+    Локальный stub SuperHero API.
+
+    На любой поиск возвращается один герой с запрошенным именем,
+    новым id и данными героя фикстуры.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.templates = [
+            {
+                key: value if key in ("id", "name") else json.loads(value)
+                for key, value in hero.items()
+            }
+            for hero in load_fixture()
+        ]
+        self.searches = 0
+        self._runner: web.AppRunner | None = None
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.searches += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = request.match_info["name"]
+        hero = {
+            **self.templates[self.searches % len(self.templates)],
+            "id": str(UPSTREAM_FIRST_ID + self.searches),
+            "name": name,
+        }
+        return web.json_response(
+            {"response": "success", "results-for": name, "results": [hero]}
+        )
+
+    async def start(self) -> str:
+        """Запустить stub и вернуть его базовый URL."""
+
+        stub = web.Application()
+        stub.router.add_get("/api/{token}/search/{name}", self.search)
+        self._runner = web.AppRunner(stub)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host="127.0.0.1", port=0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/api"
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+# MARK: Scenarios
+Request = tuple[str, str, dict[str, Any]]
+
+
+def get_scenarios(heroes: int, rnd: random.Random) -> dict[str, Callable[[], Request]]:
+    """Сценарии: функции, возвращающие метод, путь и параметры очередного запроса."""
+
+    total = heroes + len(load_fixture())
+    stats = ("intelligence", "strength", "speed", "durability", "power", "combat")
+    counter = iter(range(sys.maxsize))
+
+    def first_page() -> Request:
+        return "GET", HEROES_URL, {"limit": 20}
+
+    def filter_facets() -> Request:
+        return (
+            "GET",
+            HEROES_URL,
+            {
+                "publisher": rnd.choice(["Marvel Comics", "DC Comics"]),
+                "alignment": rnd.choice(["good", "bad"]),
+                "limit": 20,
+            },
+        )
+
+    def filter_powerstats() -> Request:
+        first, second = rnd.sample(stats, 2)
+        return (
+            "GET",
+            HEROES_URL,
+            {
+                f"{first}_min": rnd.randint(30, 90),
+                f"{second}_min": rnd.randint(10, 60),
+                "limit": 20,
+            },
+        )
+
+    def name_contains() -> Request:
+        return (
+            "GET",
+            HEROES_URL,
+            {
+                "name_contains": rnd.choice(["man", "bat", "spider", "woman"]),
+                "limit": 20,
+            },
+        )
+
+    def deep_offset() -> Request:
+        return (
+            "GET",
+            HEROES_URL,
+            {
+                "offset": rnd.randint(total // 2, max(total - 20, total // 2)),
+                "limit": 20,
+                "include_count": False,
+            },
+        )
+
+    def sort_powerstats() -> Request:
+        return (
+            "GET",
+            HEROES_URL,
+            {
+                "sort": rnd.choice(
+                    ["strength:desc", "intelligence:desc,speed:asc", "name:asc"]
+                ),
+                "offset": rnd.randint(0, 1000),
+                "limit": 20,
+            },
+        )
+
+    def create_hero() -> Request:
+        return "POST", HEROES_URL, {"name": f"bench-upstream-{next(counter)}"}
+
+    reads = [
+        (first_page, 3),
+        (filter_facets, 3),
+        (filter_powerstats, 2),
+        (name_contains, 2),
+        (deep_offset, 1),
+        (sort_powerstats, 2),
+    ]
+
+    def mixed() -> Request:
+        scenario = rnd.choices(
+            [s for s, _ in reads], weights=[weight for _, weight in reads]
+        )[0]
+        return scenario()
+
+    return {
+        **{scenario.__name__: scenario for scenario, _ in reads},
+        "mixed": mixed,
+        "create_hero": create_hero,
+    }
+
+
+# MARK: Run
+class QueryCounter:
+    """Счетчик запросов к БД движка `EngineLocal`."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(EngineLocal.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        self.count += 1
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    next_request: Callable[[], Request],
+    requests: int,
+    concurrency: int,
+    queries: QueryCounter,
+) -> dict[str, Any]:
+    """Выполнить `requests` запросов в `concurrency` потоков и посчитать метрики."""
+
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            method, url, params = next_request()
+            started = time.perf_counter()
+            response = await client.request(method, url, params=params)
+            latencies.append(time.perf_counter() - started)
+            key = str(response.status_code)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    queries_before = queries.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p95_ms": round(percentiles[94] * 1000, 2),
+        "p99_ms": round(percentiles[98] * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "db_queries_per_request": round((queries.count - queries_before) / requests, 2),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    rnd = random.Random(args.seed)
+    scenarios = get_scenarios(args.heroes, rnd)
+    selected = args.scenarios or list(scenarios)
+    if not args.cache:
+        service.heroes_cache.maxsize = 0
+
+    upstream = UpstreamStub(latency=args.upstream_latency / 1000)
+    service.superhero_client = SuperHeroAPIClient(
+        base_url=await upstream.start(),
+        token="token",
+        limit=100,
+        limit_per_host=100,
+        connect_timeout=3,
+        read_timeout=10,
+        dns_cache_ttl=300,
+        keepalive_timeout=30,
+        max_in_flight=100,
+    )
+    queries = QueryCounter()
+    results: dict[str, Any] = {}
+
+    print(f"Добавление {args.heroes} героев...", file=sys.stderr)
+    await seed(args.heroes)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60
+        ) as client:
+            for name in selected:
+                next_request = scenarios[name]
+                # Прогрев: планы запросов, кеши Postgres и пул соединений
+                await run_scenario(
+                    client, next_request, args.warmup, args.concurrency, queries
+                )
+                results[name] = await run_scenario(
+                    client, next_request, args.requests, args.concurrency, queries
+                )
+                print(f"{name:>18}: {results[name]}", file=sys.stderr)
+    finally:
+        await service.superhero_client.close()
+        await upstream.close()
+        await cleanup()
+        await EngineLocal.dispose()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "heroes": args.heroes,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+            "upstream_latency_ms": args.upstream_latency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument(
+        "--heroes",
+        type=int,
+        default=10000,
+        help="Число героев: 10000, 100000, 1000000.",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--scenarios", nargs="+", help="Сценарии, по умолчанию выполняются все."
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Использовать кеш ответов `GET /heroes`.",
+    )
+    parser.add_argument(
+        "--upstream-latency", type=float, default=0.0, help="Задержка stub, мс."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Файл для результата в JSON.")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
@@ -0,0 +1,149 @@
+"""
+Сравнение скорости сериализации списка героев.
+
+Сравниваются два пути чтения страницы `GET /heroes`:
+
+- `orm`: ORM объекты, валидация `HeroListReadSchema` и `model_dump_json`;
+- `json`: JSON героев собирается в Postgres и встраивается в ответ.
+
+Синтетические герои добавляются в транзакции, которая откатывается
+после замера. Кеш ответов не используется.
+
+Пример:
+    python -m benchmarks.serialization --heroes 10000 --limit 100 --requests 500
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI, Query, Response
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import EngineLocal
+from src.dependencies import get_session
+from src.heroes.dao import HeroDAO
+from src.heroes.models import HeroModel
+from src.heroes.schemas import HeroListReadSchema, HeroQuerySchema
+from src.heroes.service import HeroesService
+
+SEED_SQL = """
+INSERT INTO heroes (id, name, powerstats, biography, appearance, work, connections, image)
+SELECT
+    1000000 + i,
+    'Bench Hero ' || i,
+    jsonb_build_object(
+        'intelligence', (i % 100)::text, 'strength', (i * 7 % 100)::text,
+        'speed', (i * 3 % 100)::text, 'durability', (i * 5 % 100)::text,
+        'power', (i * 11 % 100)::text, 'combat', (i * 13 % 100)::text
+    ),
+    jsonb_build_object(
+        'full-name', 'Bench Hero ' || i, 'alter-egos', 'No alter egos found.',
+        'aliases', jsonb_build_array('Hero ' || i), 'place-of-birth', '-',
+        'first-appearance', '-', 'publisher', 'Bench Comics', 'alignment', 'good'
+    ),
+    jsonb_build_object(
+        'gender', 'Male', 'race', 'Human',
+        'height', jsonb_build_array('6''2', '188 cm'),
+        'weight', jsonb_build_array('210 lb', '95 kg'),
+        'eye-color', 'Blue', 'hair-color', 'Black'
+    ),
+    jsonb_build_object('occupation', '-', 'base', '-'),
+    jsonb_build_object('group-affiliation', '-', 'relatives', '-'),
+    jsonb_build_object('url', 'https://example.com/' || i || '.jpg')
+FROM generate_series(1, :heroes) AS i
+"""
+
+
+async def find_page_with_count(
+    query: HeroQuerySchema, session: AsyncSession
+) -> tuple[list[HeroModel], int]:
+    """
+    Получить ORM объекты страницы героев и их общее число одним запросом,
+    как до формирования JSON героев в Postgres.
+    """
+
+    where = HeroDAO.prepare_filters_by_query(query=query)
+    total = select(func.count()).select_from(HeroModel).where(*where)
+    stmt = HeroDAO._select_sorted(
+        select(HeroModel, total.scalar_subquery()).where(*where),
+        order_by=HeroModel.id,
+        offset=query.offset,
+        limit=query.limit,
+        asc=query.asc,
+        after=None,
+        before=None,
+    )
+    rows = (await session.execute(stmt)).all()
+    return [row[0] for row in rows], rows[0][1] if rows else 0
+
+
+def create_app(session: AsyncSession) -> FastAPI:
+    """Приложение с обоими вариантами чтения страницы героев."""
+
+    app = FastAPI()
+    app.dependency_overrides[get_session] = lambda: session
+
+    @app.get("/orm", response_model=HeroListReadSchema)
+    async def get_heroes_orm(
+        query: HeroQuerySchema = Query(),
+        session: AsyncSession = Depends(get_session),
+    ):
+        heroes, count = await find_page_with_count(query=query, session=session)
+        return HeroListReadSchema(count=count, heroes=heroes)
+
+    @app.get("/json")
+    async def get_heroes_json(
+        query: HeroQuerySchema = Query(),
+        session: AsyncSession = Depends(get_session),
+    ) -> Response:
+        content = await HeroesService._get_heroes_page_json(
+            query=query, session=session
+        )
+        return Response(content=content, media_type="application/json")
+
+    return app
+
+
+async def measure(
+    client: httpx.AsyncClient, url: str, limit: int, requests: int
+) -> float:
+    """Выполнить запросы последовательно и вернуть число запросов в секунду."""
+
+    # Прогрев: планы запросов и кеши Postgres
+    for _ in range(10):
+        (await client.get(url, params={"limit": limit})).raise_for_status()
+
+    started = time.perf_counter()
+    for i in range(requests):
+        response = await client.get(url, params={"limit": limit, "offset": i % 50})
+        response.raise_for_status()
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with EngineLocal.connect() as conn:
+        tsx = await conn.begin()
+        await conn.execute(text(SEED_SQL), {"heroes": args.heroes})
+
+        async with AsyncSession(bind=conn) as session:
+            transport = httpx.ASGITransport(app=create_app(session))
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                for path in ("/orm", "/json"):
+                    rps = await measure(client, path, args.limit, args.requests)
+                    print(f"{path[1:]:>5}: {rps:8.1f} rps (limit={args.limit})")
+
+        await tsx.rollback()
+    await EngineLocal.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--heroes", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
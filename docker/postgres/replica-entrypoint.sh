@@ -0,0 +1,11 @@
+#!/bin/sh
+# Реплика: при первом запуске копирует данные основной БД
+# и подключается к ней для потоковой репликации
+set -e
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_basebackup --host="$PRIMARY_HOST" --username="$POSTGRES_USER" \
+        --pgdata="$PGDATA" --write-recovery-conf --wal-method=stream; do
+        sleep 1
+    done
+fi
+exec docker-entrypoint.sh postgres
@@ -12,5 +12,74 @@ DB_NAMING_CONVENTION = {
     "fk": "%(table_name)s_%(column_0_name)s_fkey",
     "pk": "%(table_name)s_pkey",
 }
+DB_APPLICATION_NAME: str = "super_hero_api"
+# Параметры запуска сессии, которые PgBouncer передает в Postgres,
+# остальные `server_settings` он отклоняет при подключении
+PGBOUNCER_STARTUP_PARAMETERS: tuple[str, ...] = (
+    "application_name",
+    "client_encoding",
+    "datestyle",
+    "timezone",
+    "standard_conforming_strings",
+)
+DB_REPLICA_CHECK_TIMEOUT: float = 1.0
+SLOW_QUERY_EXPLAIN_TIMEOUT: float = 10.0
+# Функции без побочных эффектов: запрос, вызывающий только их,
+# можно повторно выполнить в `EXPLAIN ANALYZE`
+SLOW_QUERY_ANALYZE_FUNCTIONS: frozenset[str] = frozenset(
+    {
+        "avg",
+        "coalesce",
+        "count",
+        "greatest",
+        "grouping",
+        "json_build_object",
+        "jsonb_build_object",
+        "least",
+        "lower",
+        "max",
+        "min",
+        "percentile_cont",
+        "sum",
+        "upper",
+        "word_similarity",
+    }
+)
 DEFAULT_QUERY_OFFSET: int = 0
 DEFAULT_QUERY_LIMIT: int = 100
+ESTIMATED_COUNT_THRESHOLD: int = 1000
+STREAM_PARTITION_SIZE: int = 1000
+
+# MARK: Profiling
+PROFILING_HEADER: str = "x-profile"
+PROFILING_QUERY_PARAM: str = "profile"
+
+# MARK: Heroes
+HERO_POWERSTATS: tuple[str, ...] = (
+    "intelligence",
+    "strength",
+    "speed",
+    "durability",
+    "power",
+    "combat",
+)
+# Фильтры по значениям JSONB полей: параметр запроса -> (поле героя, ключ)
+HERO_CONTAINMENT_FILTERS: dict[str, tuple[str, str]] = {
+    "publisher": ("biography", "publisher"),
+    "alignment": ("biography", "alignment"),
+    "gender": ("appearance", "gender"),
+    "race": ("appearance", "race"),
+    "group_affiliation": ("connections", "group-affiliation"),
+}
+# Фасеты агрегатов героев, см. `HERO_CONTAINMENT_FILTERS`
+HERO_FACETS: tuple[str, ...] = ("publisher", "alignment", "gender", "race")
+HERO_STATS_PERCENTILES: tuple[float, ...] = (0.25, 0.5, 0.75, 0.9)
+HERO_HISTOGRAM_BUCKET_SIZE: int = 10
+HEROES_BATCH_MAX_IDS: int = 100
+# Максимальное значение `id` героя: колонка `heroes.id` имеет тип `INTEGER`
+HERO_ID_MAX: int = 2**31 - 1
+HEROES_BATCH_MAX_NAMES: int = 100
+HEROES_IMPORT_BATCH_SIZE: int = 5000
+HEROES_IMPORT_MAX_ERRORS: int = 20
+# Максимальный размер одной записи загрузки героев, символов
+HEROES_IMPORT_MAX_RECORD_SIZE: int = 1024 * 1024
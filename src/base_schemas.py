@@ -1,12 +1,19 @@
 """Модуль основных Pydantic схем."""
 
-from pydantic import BaseModel, Field
+from typing import Self
+
+from pydantic import BaseModel, Field, model_validator
 
 from src import api_constants
 
 
 class BaseQuerySchema(BaseModel):
-    """Схема query-параметров для пагинации."""
+    """
+    Схема query-параметров для пагинации.
+
+    Поддерживаются два режима: по смещению (`offset`) и курсорный
+    (`after`/`before`). Курсорный режим не зависит от глубины страницы.
+    """
 
     offset: int | None = Field(
         default=api_constants.DEFAULT_QUERY_OFFSET,
@@ -22,6 +29,29 @@ class BaseQuerySchema(BaseModel):
         default=True,
         description="Порядок сортировки записей по выбранному полю.",
     )
+    include_count: bool = Field(
+        default=True,
+        description="Считать точное число записей. При `false` возвращается "
+        "оценка по статистике планировщика Postgres.",
+    )
+    after: str | None = Field(
+        default=None,
+        description="Курсор: вернуть записи, следующие за переданным курсором.",
+    )
+    before: str | None = Field(
+        default=None,
+        description="Курсор: вернуть записи, предшествующие переданному курсору.",
+    )
+
+    @model_validator(mode="after")
+    def check_pagination_mode(self) -> Self:
+        """Проверить, что режимы пагинации не смешиваются."""
+
+        if self.after is not None and self.before is not None:
+            raise ValueError("Параметры `after` и `before` взаимоисключающие.")
+        if (self.after is not None or self.before is not None) and self.offset:
+            raise ValueError("Курсор не может использоваться вместе с `offset`.")
+        return self
 
 
 class BaseListReadSchema(BaseModel):
@@ -31,3 +61,15 @@ class BaseListReadSchema(BaseModel):
         description="Общее число записей, соответствующих "
         "заданным параметрам фильтрации."
     )
+    count_estimated: bool = Field(
+        default=False,
+        description="Получен ли `count` в режиме оценки и может быть приблизительным.",
+    )
+    next_cursor: str | None = Field(
+        default=None,
+        description="Курсор следующей страницы для параметра `after`.",
+    )
+    prev_cursor: str | None = Field(
+        default=None,
+        description="Курсор предыдущей страницы для параметра `before`.",
+    )
@@ -0,0 +1,107 @@
+"""Модуль in-process кеша с ограничением размера и времени жизни записей."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+__all__ = ["TTLCache"]
+
+ValueType = TypeVar("ValueType")
+
+
+class TTLCache(Generic[ValueType]):
+    """
+    LRU кеш с ограничением времени жизни записей.
+
+    Инвалидация выполняется увеличением счетчика поколений: значение,
+    вычисленное до инвалидации, не будет сохранено в кеш, даже если
+    запрос завершится после нее.
+
+    Атрибуты класса:
+        maxsize (int): максимальное число записей, `0` отключает кеш.
+        ttl (float): время жизни записи в секундах.
+        generation (int): текущее поколение кеша.
+        hits (int): число попаданий в кеш.
+        misses (int): число промахов.
+        evictions (int): число вытесненных и устаревших записей.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, ValueType]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> ValueType | None:
+        """Получить значение по ключу или `None`, если его нет или оно устарело."""
+
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: ValueType,
+        generation: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        """
+        Сохранить значение, если кеш не был инвалидирован после
+        начала его вычисления.
+
+        Args:
+            key(Hashable): ключ записи.
+            value(ValueType): значение.
+            generation(int | None): поколение кеша на момент начала вычисления
+                значения, `None` - без проверки поколения.
+            ttl(float | None): время жизни записи, по умолчанию `self.ttl`.
+        """
+
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Сбросить все записи и начать новое поколение кеша."""
+
+        self.generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Получить счетчики кеша."""
+
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
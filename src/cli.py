@@ -0,0 +1,81 @@
+"""
+Модуль консольных команд API.
+
+Пример:
+    python -m src.cli import-heroes alembic/fixtures/heroes.json --format json
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from src import api_constants
+from src.database import EngineLocal, SessionLocal
+from src.heroes.importer import iter_records
+from src.heroes.service import HeroesService
+
+READ_CHUNK_SIZE: int = 1024 * 1024
+
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    """Прочитать файл частями по `READ_CHUNK_SIZE` байт."""
+
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+async def import_heroes(args: argparse.Namespace) -> None:
+    """
+    Загрузить героев из файла JSON или NDJSON.
+
+    Ошибки сервиса выводятся без трассировки, процесс завершается с кодом 1.
+    """
+
+    fmt = args.format or ("json" if args.path.suffix == ".json" else "ndjson")
+    try:
+        async with SessionLocal() as session:
+            report = await HeroesService.import_heroes(
+                records=iter_records(read_chunks(args.path), format=fmt),
+                session=session,
+                on_conflict=args.on_conflict,
+                batch_size=args.batch_size,
+            )
+    except HTTPException as ex:
+        sys.exit(f"Ошибка загрузки героев: {ex.detail}")
+    finally:
+        await EngineLocal.dispose()
+    print(report.model_dump_json(indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-heroes", help="Массовая загрузка героев из файла JSON или NDJSON."
+    )
+    import_parser.add_argument("path", type=Path, help="Путь к файлу.")
+    import_parser.add_argument(
+        "--format",
+        choices=["json", "ndjson"],
+        help="Формат файла, по умолчанию определяется по расширению.",
+    )
+    import_parser.add_argument(
+        "--on-conflict", choices=["ignore", "update"], default="ignore"
+    )
+    import_parser.add_argument(
+        "--batch-size", type=int, default=api_constants.HEROES_IMPORT_BATCH_SIZE
+    )
+    import_parser.set_defaults(handler=import_heroes)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,9 @@ class Settings(BaseSettings):
 
     MODE: Literal["DEV", "TEST", "LOCAL"]
 
+    # Admin
+    ADMIN_TOKEN: str | None = None
+
     # Postgres
     POSTGRES_DB: str
     POSTGRES_USER: str
@@ -23,6 +26,27 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str
     POOL_SIZE: int
     MAX_OVERFLOW: int
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE: int = 3600
+    POOL_PRE_PING: bool = False
+    POOL_USE_LIFO: bool = False
+    DB_COMMAND_TIMEOUT: float | None = None
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_SERVER_SETTINGS: dict[str, str] = {}
+    # Подключение через PgBouncer в режиме `pool_mode=transaction`
+    DB_POOLER_MODE: bool = False
+    DB_APP_POOL: Literal["queue", "null"] = "queue"
+    # Реплики для чтения: `host` или `host:port`, база и пользователь общие
+    POSTGRES_REPLICA_HOSTS: list[str] = []
+    DB_REPLICA_SELECTION: Literal["round_robin", "least_conn"] = "round_robin"
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 1.0
+    # Журнал медленных запросов, порог в секундах; `None` - журнал отключен
+    DB_SLOW_QUERY_THRESHOLD: float | None = None
+    DB_SLOW_QUERY_LOG_PER_MINUTE: int = 60
+    DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+    DB_SLOW_QUERY_EXPLAIN_PER_MINUTE: int = 1
 
     @property
     def DATABASE_URL(self):
@@ -32,9 +56,52 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def REPLICA_DATABASE_URLS(self) -> list[str]:
+        """Возвращает URL реплик базы данных."""
+        urls = []
+        for replica in self.POSTGRES_REPLICA_HOSTS:
+            host, _, port = replica.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+                f"@{host}:{port or self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+            )
+        return urls
+
     model_config = SettingsConfigDict(env_file=ENV_DIR, extra="allow")
 
+    # SuperHero API
     SUPERHERO_API_TOKEN: str
+    SUPERHERO_API_URL: str = "https://superheroapi.com/api"
+    SUPERHERO_API_LIMIT: int = 100
+    SUPERHERO_API_LIMIT_PER_HOST: int = 20
+    SUPERHERO_API_CONNECT_TIMEOUT: float = 3.0
+    SUPERHERO_API_READ_TIMEOUT: float = 10.0
+    SUPERHERO_API_DNS_CACHE_TTL: int = 300
+    SUPERHERO_API_KEEPALIVE_TIMEOUT: float = 30.0
+    SUPERHERO_API_MAX_IN_FLIGHT: int = 50
+    SUPERHERO_API_CACHE_SIZE: int = 1024
+    SUPERHERO_API_CACHE_TTL: float = 86400.0
+    SUPERHERO_API_CACHE_NEGATIVE_TTL: float = 3600.0
+    SUPERHERO_API_CACHE_PERSISTENT: bool = False
+
+    # Heroes
+    # `advisory` - блокировка Postgres по имени героя между процессами.
+    # Блокировка удерживается в открытой транзакции на время запроса
+    # к SuperHero API (до `SUPERHERO_API_READ_TIMEOUT`), поэтому каждый
+    # ожидающий запрос занимает соединение из пула: `POOL_SIZE + MAX_OVERFLOW`
+    # должно покрывать число одновременных созданий героев во всех процессах
+    HEROES_CREATE_LOCK: Literal["local", "advisory"] = "local"
+    HEROES_BATCH_CONCURRENCY: int = 10
+
+    # Profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: str = "/tmp/hero_api_profiles"
+
+    # Cache
+    HEROES_CACHE_SIZE: int = 512
+    HEROES_CACHE_TTL: float = 30.0
 
 
 api_settings: Settings = Settings()
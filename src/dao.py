@@ -1,15 +1,71 @@
-from typing import Any, Generic, Literal, TypeVar, overload
+import hashlib
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Generic,
+    Literal,
+    NamedTuple,
+    Sequence,
+    TypeVar,
+    overload,
+)
 
 from pydantic import BaseModel
-from sqlalchemy import func, insert, select
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    Text,
+    and_,
+    any_,
+    cast,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import ClauseElement, Executable, UnaryExpression
 
+from src import api_constants, exceptions
 from src.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 
 
+class BulkWriteResult(NamedTuple):
+    """Отчет о массовой записи с обработкой конфликтов первичного ключа."""
+
+    inserted: list[Any]
+    updated: list[Any]
+    skipped: list[Any]
+
+
+class Explain(Executable, ClauseElement):
+    """Конструкция `EXPLAIN` для произвольного SQLAlchemy запроса."""
+
+    inherit_cache = False
+
+    def __init__(self, statement, options: str = "FORMAT JSON"):
+        self.statement = statement
+        self.options = options
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN ({element.options}) " + compiler.process(element.statement, **kw)
+
+
 class BaseDAO(Generic[ModelType, CreateSchemaType]):
     """
     Основной класс интерфейсов для операция с моделям БД.
@@ -39,13 +95,25 @@ class BaseDAO(Generic[ModelType, CreateSchemaType]):
         returning: Literal[False] = False,
     ) -> None: ...
 
+    @overload
     @classmethod
     async def add_bulk(
         cls,
         session: AsyncSession,
         data: list[dict[str, Any]],
         returning: bool = False,
-    ) -> list[ModelType] | None:
+        *,
+        on_conflict: Literal["ignore", "update"],
+    ) -> BulkWriteResult: ...
+
+    @classmethod
+    async def add_bulk(
+        cls,
+        session: AsyncSession,
+        data: list[dict[str, Any]],
+        returning: bool = False,
+        on_conflict: Literal["ignore", "update"] | None = None,
+    ) -> list[ModelType] | BulkWriteResult | None:
         """
         Добавить несколько записей в текущую сессию.
 
@@ -53,11 +121,20 @@ class BaseDAO(Generic[ModelType, CreateSchemaType]):
             session(AsyncSession): асинхронная сессия SQLAlchemy.
             data(list[dict[str, Any]]): данные для добавления.
             returning(bool = True): возвращать ли все поля созданных моделей.
+            on_conflict(Literal["ignore", "update"] | None): обработка записей
+                с уже существующим первичным ключом: пропустить (`ignore`) или
+                обновить (`update`). По умолчанию конфликт вызывает `IntegrityError`.
 
         Returns:
-            list[ModelType]|None): созданные экземпляры модели или `None`.
+            list[ModelType]|BulkWriteResult|None): созданные экземпляры модели,
+                отчет о записи при `on_conflict` или `None`.
         """
 
+        if on_conflict is not None:
+            return await cls._upsert_bulk(
+                session=session, data=data, on_conflict=on_conflict
+            )
+
         stmt = insert(cls.model)
         if returning:
             stmt = stmt.returning(cls.model)
@@ -66,6 +143,75 @@ class BaseDAO(Generic[ModelType, CreateSchemaType]):
         else:
             await session.execute(stmt, data)
 
+    @classmethod
+    async def _upsert_bulk(
+        cls,
+        session: AsyncSession,
+        data: list[dict[str, Any]],
+        on_conflict: Literal["ignore", "update"],
+    ) -> BulkWriteResult:
+        """
+        Добавить несколько записей одним запросом `INSERT ... ON CONFLICT`.
+
+        Вставленные и обновленные записи различаются по системной колонке
+        `xmax`, которая равна 0 только у вставленных строк.
+        """
+
+        primary_key = list(cls.model.__table__.primary_key.columns)
+        # Один запрос ON CONFLICT DO UPDATE не может изменить строку дважды
+        rows = {tuple(row[column.key] for column in primary_key): row for row in data}
+        if not rows:
+            return BulkWriteResult(inserted=[], updated=[], skipped=[])
+
+        stmt = pg_insert(cls.model).values(list(rows.values()))
+        if on_conflict == "ignore":
+            stmt = stmt.on_conflict_do_nothing(index_elements=primary_key)
+        else:
+            fields = next(iter(rows.values())).keys()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=primary_key,
+                set_={
+                    column.key: stmt.excluded[column.key]
+                    for column in cls.model.__table__.columns
+                    if column.key in fields
+                    and not column.primary_key
+                    and column.computed is None
+                },
+            )
+        stmt = stmt.returning(
+            *primary_key, literal_column("xmax = 0").label("inserted")
+        )
+        result = await session.execute(stmt)
+
+        inserted, updated = [], []
+        for *key, is_inserted in result.all():
+            (inserted if is_inserted else updated).append(tuple(key))
+        written = set(inserted) | set(updated)
+
+        def unpack(keys: list[tuple]) -> list[Any]:
+            return [key[0] for key in keys] if len(primary_key) == 1 else keys
+
+        return BulkWriteResult(
+            inserted=unpack(inserted),
+            updated=unpack(updated),
+            skipped=unpack([key for key in rows if key not in written]),
+        )
+
+    # MARK: Lock
+    @classmethod
+    async def advisory_xact_lock(cls, key: str, session: AsyncSession) -> None:
+        """
+        Получить транзакционную advisory-блокировку Postgres по строковому ключу.
+
+        Блокировка действует между всеми процессами, работающими с БД,
+        и освобождается при завершении транзакции.
+        """
+
+        lock_key = f"{cls.model.__tablename__}:{key}"
+        await session.execute(
+            select(func.pg_advisory_xact_lock(func.hashtextextended(lock_key, 0)))
+        )
+
     # MARK: Count
     @classmethod
     async def count(
@@ -83,7 +229,189 @@ class BaseDAO(Generic[ModelType, CreateSchemaType]):
         stmt = select(func.count()).select_from(cls.model).where(*where)
         return await session.scalar(stmt) or 0
 
+    @classmethod
+    async def estimate_count(
+        cls,
+        *where,
+        session: AsyncSession,
+    ) -> int:
+        """
+        Оценить количество строк в БД, соответствующих критериям,
+        по статистике планировщика без полного сканирования.
+
+        Без фильтров используется `pg_class.reltuples`, с фильтрами -
+        оценка числа строк из `EXPLAIN`. Если оценка меньше
+        `ESTIMATED_COUNT_THRESHOLD`, выполняется точный подсчет,
+        т.к. он дешевый, а оценка для узких выборок неточна.
+
+        Returns:
+            rows_count: приблизительное количество строк.
+        """
+
+        if where:
+            plan = await session.scalar(Explain(select(cls.model.id).where(*where)))
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+        else:
+            # reltuples = -1, если таблица еще не анализировалась
+            estimate = int(
+                await session.scalar(
+                    text(
+                        "SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"
+                    ),
+                    {"table": cls.model.__tablename__},
+                )
+            )
+
+        if estimate < api_constants.ESTIMATED_COUNT_THRESHOLD:
+            return await cls.count(*where, session=session)
+        return estimate
+
+    # MARK: Keyset
+    @classmethod
+    def sort_spec(cls, order_by) -> list[tuple[Any, bool]]:
+        """
+        Получить ключи сортировки и их направление (`True` - по возрастанию)
+        с `id` в качестве последнего уникального ключа, обеспечивающего
+        стабильный порядок записей.
+
+        Args:
+            order_by: колонка или последовательность колонок,
+                в том числе с `.asc()`/`.desc()`.
+        """
+
+        items = order_by if isinstance(order_by, (list, tuple)) else [order_by]
+        spec = []
+        for item in items:
+            if isinstance(item, UnaryExpression) and item.modifier is not None:
+                spec.append((item.element, item.modifier is operators.asc_op))
+            else:
+                spec.append((item, True))
+        if not any(
+            getattr(column, "key", None) == cls.model.id.key for column, _ in spec
+        ):
+            spec.append((cls.model.id, True))
+        return spec
+
+    @classmethod
+    def sort_signature(cls, order_by) -> str:
+        """
+        Получить подпись ключей сортировки и их направлений для курсоров
+        пагинации: курсор одной сортировки не принимается для другой.
+        """
+
+        spec = ";".join(
+            f"{column}:{'asc' if asc else 'desc'}"
+            for column, asc in cls.sort_spec(order_by)
+        )
+        return hashlib.blake2s(spec.encode(), digest_size=6).hexdigest()
+
+    @classmethod
+    def sort_keys(cls, order_by) -> list:
+        """Получить колонки ключей сортировки, см. `sort_spec`."""
+
+        return [column for column, _ in cls.sort_spec(order_by)]
+
+    @classmethod
+    def _order_clauses(cls, spec: list[tuple[Any, bool]], ascending: bool) -> list:
+        """
+        Подготовить выражения `ORDER BY` по ключам сортировки.
+        При `ascending=False` порядок всех ключей меняется на обратный.
+        """
+
+        return [
+            column.asc() if asc == ascending else column.desc() for column, asc in spec
+        ]
+
+    @staticmethod
+    def _is_cursor_value(column, value: Any) -> bool:
+        """Проверить, что значение из курсора соответствует типу ключа сортировки."""
+
+        if value is None or isinstance(value, bool):
+            return False
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            # Тип выражения неизвестен (например, результат функции)
+            return isinstance(value, (int, float, str))
+        if python_type is float:
+            return isinstance(value, (int, float))
+        return isinstance(value, python_type)
+
+    @classmethod
+    def _keyset_filter(
+        cls, spec: list[tuple[Any, bool]], values: list[Any], forward: bool
+    ):
+        """
+        Подготовить условие выборки записей, расположенных после (`forward=True`)
+        или до переданных значений ключей сортировки.
+
+        Ключи сортировки не должны содержать `NULL`: для колонок,
+        допускающих `NULL`, сортировка выполняется по выражению с `coalesce`.
+
+        Raises:
+            InvalidCursor: Некорректный курсор пагинации `HTTP_400_BAD_REQUEST`.
+        """
+
+        if len(values) != len(spec) or not all(
+            cls._is_cursor_value(column, value)
+            for (column, _), value in zip(spec, values, strict=True)
+        ):
+            raise exceptions.InvalidCursor
+
+        keys = [column for column, _ in spec]
+        greater = [forward == asc for _, asc in spec]
+        if len(set(greater)) == 1:
+            if len(keys) == 1:
+                return keys[0] > values[0] if greater[0] else keys[0] < values[0]
+            # Сравнение строк `(a, b) > (x, y)` обслуживается составным индексом
+            if greater[0]:
+                return tuple_(*keys) > tuple_(*values)
+            return tuple_(*keys) < tuple_(*values)
+
+        # Разные направления ключей: сравнение строк раскрывается
+        # в `k1 > v1 OR (k1 = v1 AND k2 < v2) OR ...`, а избыточное условие
+        # `k1 >= v1` позволяет использовать индекс по первому ключу
+        conditions = [
+            and_(
+                *(keys[j] == values[j] for j in range(i)),
+                keys[i] > values[i] if greater[i] else keys[i] < values[i],
+            )
+            for i in range(len(keys))
+        ]
+        bound = keys[0] >= values[0] if greater[0] else keys[0] <= values[0]
+        return and_(bound, or_(*conditions))
+
     # MARK: Find
+    @classmethod
+    def _select_sorted(
+        cls,
+        stmt: Select,
+        order_by,
+        offset: int | None,
+        limit: int | None,
+        asc: bool,
+        after: list[Any] | None,
+        before: list[Any] | None,
+    ) -> Select:
+        """Добавить к запросу сортировку и пагинацию по смещению или курсору."""
+
+        spec = cls.sort_spec(order_by)
+        # Для `before` записи выбираются в обратном порядке и затем разворачиваются
+        ascending = asc != (before is not None)
+
+        if after is not None:
+            stmt = stmt.where(cls._keyset_filter(spec, after, forward=asc))
+        elif before is not None:
+            stmt = stmt.where(cls._keyset_filter(spec, before, forward=not asc))
+        else:
+            stmt = stmt.offset(offset)
+
+        return stmt.limit(limit).order_by(
+            *cls._order_clauses(spec, ascending=ascending)
+        )
+
     @classmethod
     async def find_all_sorted(
         cls,
@@ -93,18 +421,144 @@ class BaseDAO(Generic[ModelType, CreateSchemaType]):
         offset: int | None,
         limit: int | None,
         asc: bool,
+        after: list[Any] | None = None,
+        before: list[Any] | None = None,
     ) -> list[ModelType]:
         """
         Получить все записи с фильтрацией по переданным
         query-параметрам и с учетом пагинации.
+
+        При передаче `after`/`before` (значения ключей сортировки из курсора)
+        вместо `offset` используется keyset-пагинация: выборка начинается
+        сразу с нужной позиции индекса, без пропуска предыдущих строк.
+        """
+
+        stmt = cls._select_sorted(
+            select(cls.model).where(*where),
+            order_by=order_by,
+            offset=offset,
+            limit=limit,
+            asc=asc,
+            after=after,
+            before=before,
+        )
+        result = await session.execute(stmt)
+        rows = result.scalars().all()
+        return rows[::-1] if before is not None else rows
+
+    @staticmethod
+    def _json_record(columns: list):
+        """Выражение JSON объекта записи из колонок с именами `column.key`."""
+
+        return cast(
+            func.json_build_object(
+                *(arg for column in columns for arg in (literal(column.key), column))
+            ),
+            Text,
+        )
+
+    @classmethod
+    async def find_json_by_ids(
+        cls, ids: list[int], session: AsyncSession, columns: list
+    ) -> dict[int, str]:
+        """
+        Получить записи по списку `id`, сериализованные в JSON на стороне Postgres.
+
+        Выполняется один запрос `WHERE id = ANY($1)` по первичному ключу:
+        список передается одним параметром-массивом, поэтому текст запроса
+        не зависит от числа `id`.
+
+        Returns:
+            dict[int, str]: JSON найденных записей по `id`.
+        """
+
+        stmt = select(cls.model.id, cls._json_record(columns)).where(
+            cls.model.id == any_(literal(ids, ARRAY(Integer)))
+        )
+        result = await session.execute(stmt)
+        return dict(result.tuples().all())
+
+    @classmethod
+    async def find_json_sorted(
+        cls,
+        *where,
+        session: AsyncSession,
+        columns: list,
+        order_by,
+        offset: int | None,
+        limit: int | None,
+        asc: bool,
+        after: list[Any] | None = None,
+        before: list[Any] | None = None,
+        with_count: bool = True,
+    ) -> tuple[list[tuple[list[Any], str]], int | None]:
+        """
+        Получить страницу записей, сериализованных в JSON на стороне Postgres.
+
+        Каждая запись собирается `json_build_object` из переданных колонок,
+        поэтому ORM объекты не создаются, а значения JSONB не декодируются.
+        При `with_count` общее число записей считается в том же запросе.
+
+        Returns:
+            tuple[list[tuple[list[Any], str]], int | None]: значения ключей
+                сортировки и JSON каждой записи, общее число записей или `None`.
+        """
+
+        keys = cls.sort_keys(order_by)
+        selected = [*keys, cls._json_record(columns)]
+        if with_count:
+            total = select(func.count()).select_from(cls.model).where(*where)
+            selected.append(total.scalar_subquery())
+
+        stmt = cls._select_sorted(
+            select(*selected).where(*where),
+            order_by=order_by,
+            offset=offset,
+            limit=limit,
+            asc=asc,
+            after=after,
+            before=before,
+        )
+        result = await session.execute(stmt)
+        rows = result.all()
+        if before is not None:
+            rows = rows[::-1]
+
+        records = [(list(row[: len(keys)]), row[len(keys)]) for row in rows]
+        if not with_count:
+            return records, None
+        if rows:
+            return records, rows[0][-1]
+        if offset or after is not None or before is not None:
+            return [], await cls.count(*where, session=session)
+        return [], 0
+
+    @classmethod
+    async def stream_all_sorted(
+        cls,
+        *where,
+        session: AsyncSession,
+        columns: list,
+        order_by,
+        asc: bool,
+        partition_size: int = api_constants.STREAM_PARTITION_SIZE,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Получить все записи, соответствующие фильтрам, частями по `partition_size`.
+
+        Записи читаются через серверный курсор без создания ORM объектов,
+        поэтому потребление памяти не зависит от числа записей.
+
+        Args:
+            columns(list): выбираемые колонки модели.
         """
 
         stmt = (
-            select(cls.model)
+            select(*columns)
             .where(*where)
-            .offset(offset)
-            .limit(limit)
-            .order_by(order_by.asc() if asc else order_by.desc())
+            .order_by(*cls._order_clauses(cls.sort_spec(order_by), ascending=asc))
+            .execution_options(yield_per=partition_size)
         )
-        result = await session.execute(stmt)
-        return result.scalars().all()
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
@@ -1,13 +1,24 @@
 """Модуль конфигурации SQLAlchemy."""
 
-from sqlalchemy import AsyncAdaptedQueuePool, MetaData
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import Literal
+from uuid import uuid4
+
+from sqlalchemy import MetaData, NullPool
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from src import api_constants
 from src.config import api_settings
+from src.metrics import instrument_engine
+from src.pool import InstrumentedAsyncQueuePool
+from src.slow_queries import slow_query_log
 
-__all__ = ["Base", "SessionLocal", "EngineLocal"]
+__all__ = ["Base", "SessionLocal", "EngineLocal", "create_engine"]
 
 
 class Base(DeclarativeBase):
@@ -19,16 +30,97 @@ class Base(DeclarativeBase):
     metadata = MetaData(naming_convention=api_constants.DB_NAMING_CONVENTION)
 
 
-EngineLocal = create_async_engine(
-    url=api_settings.DATABASE_URL,
-    pool_size=api_settings.POOL_SIZE,
-    max_overflow=api_settings.MAX_OVERFLOW,
-    poolclass=AsyncAdaptedQueuePool,
-    pool_pre_ping=False,
-    pool_recycle=3600,
-    echo=True if api_settings.MODE == "LOCAL" else False,
-    connect_args={"server_settings": {"application_name": "super_hero_api"}},
-)
+def server_settings(pooler_mode: bool) -> dict[str, str]:
+    """
+    Параметры сессии Postgres, передаваемые при подключении.
+
+    PgBouncer пропускает только `PGBOUNCER_STARTUP_PARAMETERS`, поэтому
+    в режиме пулера остальные параметры `DB_SERVER_SETTINGS` не допускаются:
+    их следует задать для роли или базы (`ALTER ROLE ... SET`).
+
+    Raises:
+        ValueError: Параметр не поддерживается PgBouncer.
+    """
+
+    settings = {
+        "application_name": api_constants.DB_APPLICATION_NAME,
+        **api_settings.DB_SERVER_SETTINGS,
+    }
+    if pooler_mode:
+        unsupported = sorted(
+            name
+            for name in settings
+            if name.lower() not in api_constants.PGBOUNCER_STARTUP_PARAMETERS
+        )
+        if unsupported:
+            raise ValueError(
+                "Параметры сессии не поддерживаются PgBouncer: "
+                f"{', '.join(unsupported)}."
+            )
+    return settings
+
+
+def create_engine(
+    url: str,
+    pooler_mode: bool = api_settings.DB_POOLER_MODE,
+    app_pool: Literal["queue", "null"] = api_settings.DB_APP_POOL,
+) -> AsyncEngine:
+    """
+    Создать движок SQLAlchemy с настройками пула из `Settings`.
+
+    В режиме пулера (PgBouncer, `pool_mode=transaction`) соединения
+    с Postgres переключаются между клиентами после каждой транзакции,
+    поэтому кеши подготовленных запросов отключены, а каждый запрос
+    подготавливается под уникальным именем и не конфликтует с запросами
+    других клиентов того же соединения.
+
+    Args:
+        url (str): URL подключения к Postgres или PgBouncer.
+        pooler_mode (bool): подключение через PgBouncer.
+        app_pool (Literal["queue", "null"]): пул соединений приложения,
+            `null` - без пула, соединения удерживает только PgBouncer.
+    """
+
+    connect_args = {
+        "server_settings": server_settings(pooler_mode),
+        "command_timeout": api_settings.DB_COMMAND_TIMEOUT,
+        # Кеш подготовленных запросов asyncpg и кеш SQLAlchemy над ним
+        "statement_cache_size": api_settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": api_settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if pooler_mode:
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+
+    if app_pool == "null":
+        pool_args = {"poolclass": NullPool}
+    else:
+        pool_args = {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": api_settings.POOL_SIZE,
+            "max_overflow": api_settings.MAX_OVERFLOW,
+            "pool_timeout": api_settings.POOL_TIMEOUT,
+            "pool_recycle": api_settings.POOL_RECYCLE,
+            "pool_use_lifo": api_settings.POOL_USE_LIFO,
+        }
+
+    engine = create_async_engine(
+        url=url,
+        **pool_args,
+        pool_pre_ping=api_settings.POOL_PRE_PING,
+        echo=True if api_settings.MODE == "LOCAL" else False,
+        connect_args=connect_args,
+    )
+    instrument_engine(engine)
+    if api_settings.DB_SLOW_QUERY_THRESHOLD is not None:
+        slow_query_log.instrument(engine)
+    return engine
+
+
+EngineLocal = create_engine(url=api_settings.DATABASE_URL)
 
 SessionLocal = async_sessionmaker(
     bind=EngineLocal,
@@ -1,8 +1,13 @@
+import secrets
 from typing import AsyncGenerator
 
+from fastapi import Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src import exceptions
+from src.config import api_settings
 from src.database import SessionLocal
+from src.replicas import read_replicas
 
 
 # MARK: Session
@@ -18,3 +23,48 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         except Exception as ex:
             raise ex
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    AsyncGenerator экземпляра `AsyncSession` для запросов только на чтение.
+
+    Сессия открывается на реплике из `POSTGRES_REPLICA_HOSTS`, а если реплики
+    не заданы, недоступны или отстают больше `DB_REPLICA_MAX_LAG` - на основной БД.
+    """
+
+    async with read_replicas.session() as session:
+        yield session
+
+
+# MARK: Admin
+def is_admin_token(token: str | None) -> bool:
+    """
+    Проверить токен администратора.
+
+    Если `ADMIN_TOKEN` не задан, ни один токен не считается верным.
+    """
+
+    return (
+        api_settings.ADMIN_TOKEN is not None
+        and token is not None
+        and secrets.compare_digest(token, api_settings.ADMIN_TOKEN)
+    )
+
+
+async def verify_admin_token(
+    x_admin_token: str | None = Header(
+        default=None, description="Токен администратора"
+    ),
+) -> None:
+    """
+    Проверить токен администратора в заголовке `X-Admin-Token`.
+
+    Если `ADMIN_TOKEN` не задан, административные эндпоинты недоступны.
+
+    Raises:
+        AdminAccessDenied: Доступ запрещен `HTTP_403_FORBIDDEN`.
+    """
+
+    if not is_admin_token(x_admin_token):
+        raise exceptions.AdminAccessDenied
@@ -29,3 +29,33 @@ class SuperHeroAPINotAvailable(HTTPException):
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Сервис SuperHeroAPI не доступен.",
         )
+
+
+class InvalidCursor(HTTPException):
+    """Возникает, если передан некорректный курсор пагинации."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации",
+        )
+
+
+class AdminAccessDenied(HTTPException):
+    """Возникает, если запрос к административному эндпоинту не авторизован."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещен",
+        )
+
+
+class InvalidImportData(HTTPException):
+    """Возникает, если данные для загрузки героев не удается разобрать."""
+
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=detail,
+        )
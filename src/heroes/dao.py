@@ -1,8 +1,46 @@
-from sqlalchemy import Integer, and_, cast
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal
 
+from pydantic import BaseModel
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    cast,
+    distinct,
+    func,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array, insert
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable, DropTable
+
+from src import api_constants
 from src.dao import BaseDAO
-from src.heroes.models import HeroModel
-from src.heroes.schemas import HeroQuerySchema, HeroReadSchema
+from src.heroes.importer import JSONB_FIELDS
+from src.heroes.models import HeroModel, SuperHeroAPICacheModel
+from src.heroes.schemas import HeroFilterSchema, HeroReadSchema
+
+# Временная таблица для массовой загрузки героев через COPY
+heroes_import_table = Table(
+    "heroes_import",
+    MetaData(),
+    Column("line", BigInteger, nullable=False),
+    Column("id", Integer, nullable=False),
+    Column("name", String, nullable=False),
+    *(Column(field, JSONB, nullable=False) for field in JSONB_FIELDS),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
 
 
 class HeroDAO(BaseDAO[HeroModel, HeroReadSchema]):
@@ -10,47 +48,257 @@ class HeroDAO(BaseDAO[HeroModel, HeroReadSchema]):
 
     model = HeroModel
 
+    # MARK: Import
+    @classmethod
+    async def create_import_staging(cls, session: AsyncSession) -> None:
+        """Создать временную таблицу для загрузки героев в текущей транзакции."""
+
+        await session.execute(CreateTable(heroes_import_table))
+
+    @classmethod
+    async def drop_import_staging(cls, session: AsyncSession) -> None:
+        """Удалить временную таблицу для загрузки героев."""
+
+        await session.execute(DropTable(heroes_import_table))
+
+    @classmethod
+    async def copy_to_import_staging(
+        cls, records: list[tuple[Any, ...]], session: AsyncSession
+    ) -> None:
+        """
+        Записать пачку героев во временную таблицу протоколом `COPY`.
+
+        Args:
+            records(list[tuple[Any, ...]]): номер строки и значения полей
+                в порядке колонок `heroes_import_table`.
+        """
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            heroes_import_table.name,
+            records=records,
+            columns=[column.name for column in heroes_import_table.columns],
+        )
+
     @classmethod
-    def prepare_filters_by_query(cls, query: HeroQuerySchema) -> list:
-        """Подготовить список фильтров для запроса списка героев в БД."""
+    async def merge_import_staging(
+        cls, session: AsyncSession, on_conflict: Literal["ignore", "update"]
+    ) -> tuple[int, int, int]:
+        """
+        Перенести героев из временной таблицы в `heroes` одним запросом
+        и удалить временную таблицу.
+
+        При повторении `id` во входных данных используется последняя запись.
+
+        Returns:
+            tuple[int, int, int]: число добавленных, обновленных
+                и пропущенных героев.
+        """
+
+        staging = heroes_import_table
+        fields = [column.name for column in staging.columns if column.name != "line"]
+        source = (
+            select(*(staging.c[field] for field in fields))
+            .distinct(staging.c.id)
+            .order_by(staging.c.id, staging.c.line.desc())
+        )
+        stmt = insert(cls.model).from_select(fields, source)
+        if on_conflict == "ignore":
+            stmt = stmt.on_conflict_do_nothing(index_elements=[cls.model.id])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.model.id],
+                set_={field: stmt.excluded[field] for field in fields if field != "id"},
+            )
+        merged = stmt.returning(literal_column("xmax = 0").label("inserted")).cte(
+            "merged"
+        )
+        result = await session.execute(
+            select(
+                func.count().filter(merged.c.inserted),
+                func.count().filter(~merged.c.inserted),
+                select(func.count(distinct(staging.c.id))).scalar_subquery(),
+            )
+        )
+        inserted, updated, total = result.one()
+        await cls.drop_import_staging(session=session)
+        return inserted, updated, total - inserted - updated
+
+    @classmethod
+    def prepare_filters_by_query(cls, query: HeroFilterSchema) -> list:
+        """
+        Подготовить список фильтров для запроса списка героев в БД.
+
+        Характеристики фильтруются по вычисляемым колонкам модели,
+        которые обслуживаются B-tree индексами, значения JSONB полей -
+        условием `@>` по GIN индексам. Поиск по подстроке
+        и нечеткий поиск обслуживаются trigram GIN индексами `pg_trgm`.
+        """
 
         filters = []
-        stat_fields = [
-            "intelligence",
-            "strength",
-            "speed",
-            "durability",
-            "power",
-            "combat",
-        ]
         query_data = query.model_dump(exclude_none=True, exclude_unset=True)
 
-        for field in stat_fields:
+        for field in api_constants.HERO_POWERSTATS:
             value = query_data.get(field, None)
             min_value = query_data.get(f"{field}_min", None)
             max_value = query_data.get(f"{field}_max", None)
 
-            json_field = HeroModel.powerstats[field].astext
+            column = getattr(HeroModel, field)
 
             if value is not None:
-                filters.append(
-                    and_(json_field != "null", cast(json_field, Integer) == value)
-                )
+                filters.append(column == value)
             else:
                 if min_value is not None:
-                    filters.append(
-                        and_(
-                            json_field != "null", cast(json_field, Integer) >= min_value
-                        )
-                    )
+                    filters.append(column >= min_value)
                 if max_value is not None:
-                    filters.append(
-                        and_(
-                            json_field != "null", cast(json_field, Integer) <= max_value
-                        )
-                    )
+                    filters.append(column <= max_value)
+
+        # Значения одного JSONB поля объединяются в одно условие `@>`,
+        # которое обслуживается GIN индексом `jsonb_path_ops`
+        contained: dict[str, dict[str, str]] = {}
+        for param, (field, key) in api_constants.HERO_CONTAINMENT_FILTERS.items():
+            value = query_data.get(param, None)
+            if value is not None:
+                contained.setdefault(field, {})[key] = value
+        for field, value in contained.items():
+            filters.append(getattr(HeroModel, field).contains(value))
 
         if query.name is not None:
             filters.append(HeroModel.name == query.name)
+        if query.name_contains is not None:
+            filters.append(
+                HeroModel.name.icontains(query.name_contains, autoescape=True)
+            )
+        if query.q is not None:
+            # `a %> b` - в `a` есть слово, похожее на `b`
+            filters.append(
+                or_(
+                    *(column.op("%>")(query.q) for column in HeroModel.search_columns())
+                )
+            )
 
         return filters
+
+    @classmethod
+    async def aggregate(
+        cls, *where, session: AsyncSession, bucket_size: int
+    ) -> list[RowMapping]:
+        """
+        Посчитать агрегаты героев за один проход по таблице с `GROUPING SETS`.
+
+        Каждая строка результата относится к одному набору группировки:
+        все герои, значение фасета `HERO_FACETS` или интервал гистограммы
+        характеристики (`<stat>_bucket`). Набор определяется флагами
+        `grouping_<колонка>`: 0 - группировка выполнена по колонке.
+
+        Returns:
+            list[RowMapping]: значения группировки, `count` и статистики
+                `<stat>_count/min/max/avg/percentiles` по каждой характеристике.
+        """
+
+        facets = []
+        for facet in api_constants.HERO_FACETS:
+            field, key = api_constants.HERO_CONTAINMENT_FILTERS[facet]
+            column = getattr(HeroModel, field).op("->>", return_type=Text)(key)
+            facets.append(column.label(facet))
+
+        heroes = (
+            select(
+                *facets,
+                *(getattr(HeroModel, stat) for stat in api_constants.HERO_POWERSTATS),
+                *(
+                    (
+                        getattr(HeroModel, stat)
+                        - getattr(HeroModel, stat) % bucket_size
+                    ).label(f"{stat}_bucket")
+                    for stat in api_constants.HERO_POWERSTATS
+                ),
+            )
+            .where(*where)
+            .subquery("heroes")
+        )
+
+        dimensions = [heroes.c[facet] for facet in api_constants.HERO_FACETS] + [
+            heroes.c[f"{stat}_bucket"] for stat in api_constants.HERO_POWERSTATS
+        ]
+        percentiles = cast(array(api_constants.HERO_STATS_PERCENTILES), ARRAY(Float))
+        aggregates = []
+        for stat in api_constants.HERO_POWERSTATS:
+            column = heroes.c[stat]
+            aggregates += [
+                func.count(column).label(f"{stat}_count"),
+                func.min(column).label(f"{stat}_min"),
+                func.max(column).label(f"{stat}_max"),
+                cast(func.avg(column), Float).label(f"{stat}_avg"),
+                func.percentile_cont(percentiles)
+                .within_group(column)
+                .label(f"{stat}_percentiles"),
+            ]
+
+        stmt = select(
+            *dimensions,
+            *(
+                func.grouping(column).label(f"grouping_{column.name}")
+                for column in dimensions
+            ),
+            func.count().label("count"),
+            *aggregates,
+        ).group_by(
+            func.grouping_sets(tuple_(), *(tuple_(column) for column in dimensions))
+        )
+        result = await session.execute(stmt)
+        return result.mappings().all()
+
+    @classmethod
+    def search_rank(cls, q: str):
+        """Степень сходства героя с поисковым запросом `q` от 0 до 1."""
+
+        return func.greatest(
+            *(func.word_similarity(q, column) for column in HeroModel.search_columns())
+        )
+
+
+class SuperHeroAPICacheDAO(BaseDAO[SuperHeroAPICacheModel, BaseModel]):
+    """DAO для работы с кешем результатов поиска в сервисе SuperHero API."""
+
+    model = SuperHeroAPICacheModel
+
+    @classmethod
+    async def find_valid(
+        cls, key: str, session: AsyncSession
+    ) -> tuple[list[dict], float] | None:
+        """
+        Получить не истекшие результаты поиска по ключу.
+
+        Returns:
+            tuple[list[dict], float] | None: результаты поиска и оставшееся
+                время жизни записи в секундах или `None`.
+        """
+
+        now = datetime.now(timezone.utc)
+        stmt = select(cls.model).where(cls.model.key == key, cls.model.expires_at > now)
+        entry = await session.scalar(stmt)
+        if entry is None:
+            return None
+        return entry.results, (entry.expires_at - now).total_seconds()
+
+    @classmethod
+    async def put(
+        cls, key: str, results: list[dict], ttl: float, session: AsyncSession
+    ) -> None:
+        """Сохранить или обновить результаты поиска по ключу."""
+
+        stmt = insert(cls.model).values(
+            key=key,
+            results=results,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.model.key],
+            set_={
+                "results": stmt.excluded.results,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        await session.execute(stmt)
@@ -0,0 +1,207 @@
+"""Модуль потокового разбора данных героев для массовой загрузки."""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Literal
+
+from src import api_constants, exceptions
+from src.heroes.schemas import HeroReadSchema
+
+__all__ = ["JSONArrayParser", "NDJSONParser", "iter_records", "prepare_record"]
+
+IMPORT_FIELDS: tuple[str, ...] = tuple(HeroReadSchema.model_fields)
+JSONB_FIELDS: tuple[str, ...] = tuple(
+    field for field in IMPORT_FIELDS if field not in ("id", "name")
+)
+# Незавершенная лексема в конце данных: часть числа, `true`, `\uXXXX` и т.п.
+_INCOMPLETE_TOKEN_RE = re.compile(r'[^\s,:\[\]{}"]*')
+
+
+def _check_record_size(size: int) -> None:
+    """
+    Проверить размер еще не прочитанной до конца записи.
+
+    Raises:
+        InvalidImportData: Запись больше `HEROES_IMPORT_MAX_RECORD_SIZE`
+            `HTTP_422_UNPROCESSABLE_ENTITY`.
+    """
+
+    if size > api_constants.HEROES_IMPORT_MAX_RECORD_SIZE:
+        raise exceptions.InvalidImportData(
+            "Размер записи превышает "
+            f"{api_constants.HEROES_IMPORT_MAX_RECORD_SIZE} символов."
+        )
+
+
+class NDJSONParser:
+    """
+    Инкрементальный разбор NDJSON: один JSON объект в строке.
+
+    Строки возвращаются без декодирования, чтобы ошибка в одной строке
+    обрабатывалась как некорректная запись в `prepare_record`.
+    Размер строки ограничен `HEROES_IMPORT_MAX_RECORD_SIZE`.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Добавить часть текста и получить полностью прочитанные строки."""
+
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            _check_record_size(len(line))
+        _check_record_size(len(self._buffer))
+        return [line for line in lines if line.strip()]
+
+    def close(self) -> list[str]:
+        """Завершить разбор и получить последнюю строку без перевода строки."""
+
+        line, self._buffer = self._buffer, ""
+        return [line] if line.strip() else []
+
+
+class JSONArrayParser:
+    """
+    Инкрементальный разбор JSON массива объектов.
+
+    Поддерживается как массив верхнего уровня, так и формат фикстуры
+    `{"heroes": [...]}`: разбор начинается с первой `[` в данных.
+    В памяти хранится только текущий, еще не прочитанный до конца элемент,
+    его размер ограничен `HEROES_IMPORT_MAX_RECORD_SIZE`. Синтаксическая
+    ошибка в элементе прерывает разбор: границу следующего элемента
+    в некорректных данных определить нельзя.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+        self._started = False
+        self._finished = False
+        self._count = 0
+
+    def _is_incomplete(self, ex: json.JSONDecodeError) -> bool:
+        """Проверить, что ошибка разбора вызвана концом данных, а не синтаксисом."""
+
+        if ex.msg.startswith("Unterminated string"):
+            return True
+        return _INCOMPLETE_TOKEN_RE.fullmatch(self._buffer, ex.pos) is not None
+
+    def feed(self, text: str) -> list[Any]:
+        """
+        Добавить часть текста и получить полностью прочитанные элементы.
+
+        Raises:
+            InvalidImportData: Некорректный JSON или слишком большой элемент
+                `HTTP_422_UNPROCESSABLE_ENTITY`.
+        """
+
+        if self._finished:
+            return []
+        self._buffer += text
+
+        if not self._started:
+            start = self._buffer.find("[")
+            if start == -1:
+                _check_record_size(len(self._buffer))
+                return []
+            self._buffer = self._buffer[start + 1 :]
+            self._started = True
+
+        items, pos = [], 0
+        while True:
+            while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(self._buffer):
+                break
+            if self._buffer[pos] == "]":
+                self._finished = True
+                pos = len(self._buffer)
+                break
+            try:
+                item, pos = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError as ex:
+                if not self._is_incomplete(ex):
+                    raise exceptions.InvalidImportData(
+                        f"Некорректный JSON: {ex.msg}, позиция {ex.pos - pos} "
+                        f"в элементе {self._count + 1}."
+                    ) from ex
+                # Элемент прочитан не полностью, ждем следующую часть данных
+                break
+            self._count += 1
+            items.append(item)
+
+        self._buffer = self._buffer[pos:]
+        _check_record_size(len(self._buffer))
+        return items
+
+    def close(self) -> list[Any]:
+        """
+        Завершить разбор.
+
+        Raises:
+            InvalidImportData: Данные не являются корректным JSON массивом
+                `HTTP_422_UNPROCESSABLE_ENTITY`.
+        """
+
+        if not self._finished:
+            raise exceptions.InvalidImportData(
+                "Некорректный JSON: массив героев не завершен."
+            )
+        return []
+
+
+async def iter_records(
+    chunks: AsyncIterable[bytes], format: Literal["json", "ndjson"]
+) -> AsyncIterator[Any]:
+    """
+    Прочитать записи из потока байтов без загрузки всех данных в память.
+
+    Args:
+        chunks(AsyncIterable[bytes]): поток данных в кодировке UTF-8.
+        format(Literal["json", "ndjson"]): формат данных.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parser = JSONArrayParser() if format == "json" else NDJSONParser()
+    async for chunk in chunks:
+        for record in parser.feed(decoder.decode(chunk)):
+            yield record
+    for record in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+        yield record
+
+
+def prepare_record(record: Any) -> tuple[Any, ...]:
+    """
+    Проверить запись по схеме `HeroReadSchema` и подготовить ее к `COPY`.
+
+    Запись может быть передана строкой NDJSON. Поля JSONB могут быть переданы
+    как объектами, так и JSON строками (формат фикстуры `alembic/fixtures/heroes.json`).
+
+    Returns:
+        tuple[Any, ...]: значения полей в порядке `IMPORT_FIELDS`,
+            поля JSONB сериализованы в JSON.
+
+    Raises:
+        ValidationError: Запись не соответствует схеме героя.
+        ValueError: Запись не является JSON объектом.
+    """
+
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("Запись героя должна быть JSON объектом.")
+    record = {
+        field: json.loads(value)
+        if field in JSONB_FIELDS and isinstance(value, str)
+        else value
+        for field, value in record.items()
+    }
+    hero = HeroReadSchema.model_validate(record)
+    return (
+        hero.id,
+        hero.name,
+        *(json.dumps(record[field]) for field in JSONB_FIELDS),
+    )
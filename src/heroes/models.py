@@ -1,13 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Computed,
+    DateTime,
+    Index,
+    Integer,
+    Text,
+    func,
+    literal_column,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
+from src import api_constants
 from src.database import Base
 
 
+def powerstat_column(field: str) -> Mapped[int | None]:
+    """
+    Вычисляемая колонка с целочисленным значением характеристики героя.
+
+    Значение извлекается из `powerstats` на стороне БД при каждой записи,
+    нечисловые значения (например, `"null"`) сохраняются как `NULL`.
+    """
+
+    return mapped_column(
+        Integer,
+        Computed(
+            f"CASE WHEN (powerstats ->> '{field}') ~ '^[0-9]+$' "
+            f"THEN (powerstats ->> '{field}')::integer END",
+            persisted=True,
+        ),
+        index=True,
+        comment=f"Характеристика `{field}`",
+    )
+
+
 class HeroModel(Base):
     """Модель супер-героев."""
 
     __tablename__ = "heroes"
+    # Индексы сортировки по характеристикам, см. `HeroModel.powerstat_sort_key`.
+    # Рейтинг по убыванию (`sort=strength:desc`) читается по индексу
+    # без сортировки, `id` - ключ стабильного порядка.
+    __table_args__ = (
+        *(
+            Index(f"heroes_{field}_sort_idx", text(f"coalesce({field}, -1) DESC"), "id")
+            for field in api_constants.HERO_POWERSTATS
+        ),
+        # Нечеткий поиск и поиск по подстроке, см. `HeroModel.search_columns`
+        Index(
+            "heroes_name_trgm_idx",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Фильтры `@>` по значениям JSONB полей, см. `HERO_CONTAINMENT_FILTERS`
+        *(
+            Index(
+                f"heroes_{field}_idx",
+                field,
+                postgresql_using="gin",
+                postgresql_ops={field: "jsonb_path_ops"},
+            )
+            for field in ("biography", "appearance", "connections")
+        ),
+        Index(
+            "heroes_full_name_trgm_idx",
+            text("(biography ->> 'full-name') gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "heroes_aliases_trgm_idx",
+            text("(biography ->> 'aliases') gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(comment="Имя", index=True)
@@ -19,3 +88,53 @@ class HeroModel(Base):
     work: Mapped[dict[str, str]] = mapped_column(JSONB, comment="Работа")
     connections: Mapped[dict[str, str]] = mapped_column(JSONB, comment="Связи")
     image: Mapped[str] = mapped_column(JSONB, comment="Ссылка на изображение")
+
+    # Характеристики из `powerstats` в виде индексируемых колонок
+    intelligence: Mapped[int | None] = powerstat_column("intelligence")
+    strength: Mapped[int | None] = powerstat_column("strength")
+    speed: Mapped[int | None] = powerstat_column("speed")
+    durability: Mapped[int | None] = powerstat_column("durability")
+    power: Mapped[int | None] = powerstat_column("power")
+    combat: Mapped[int | None] = powerstat_column("combat")
+
+    @classmethod
+    def powerstat_sort_key(cls, field: str):
+        """
+        Ключ сортировки по характеристике героя.
+
+        Неизвестные значения (`NULL`) заменяются на `-1`, т.е. оказываются
+        в конце рейтинга по убыванию, а ключ сортировки не содержит `NULL`,
+        что необходимо для курсорной пагинации. Выражение совпадает
+        с выражением индекса `heroes_<field>_sort_idx`.
+        """
+
+        return func.coalesce(getattr(cls, field), literal_column("-1"))
+
+    @classmethod
+    def search_columns(cls) -> list:
+        """
+        Текстовые поля нечеткого поиска героя: имя, полное имя и псевдонимы.
+
+        Ключи JSONB подставляются в текст запроса, а не параметрами,
+        чтобы выражения совпадали с выражениями trigram индексов.
+        """
+
+        return [
+            cls.name,
+            cls.biography.op("->>", return_type=Text)(literal_column("'full-name'")),
+            cls.biography.op("->>", return_type=Text)(literal_column("'aliases'")),
+        ]
+
+
+class SuperHeroAPICacheModel(Base):
+    """Модель кеша результатов поиска героев в сервисе SuperHero API."""
+
+    __tablename__ = "superhero_api_cache"
+
+    key: Mapped[str] = mapped_column(primary_key=True, comment="Нормализованное имя")
+    results: Mapped[list[dict]] = mapped_column(
+        JSONB, comment="Результаты поиска, пустой список - герой не найден"
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, comment="Время истечения записи"
+    )
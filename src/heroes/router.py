@@ -1,8 +1,25 @@
-from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_session
-from src.heroes.schemas import HeroListReadSchema, HeroQuerySchema
+from src import api_constants
+from src.dependencies import get_read_session, get_session, verify_admin_token
+from src.heroes.importer import iter_records
+from src.heroes.schemas import (
+    HeroAggregatesQuerySchema,
+    HeroAggregatesReadSchema,
+    HeroBatchCreateReadSchema,
+    HeroBatchCreateSchema,
+    HeroBatchReadSchema,
+    HeroCreateReadSchema,
+    HeroExportQuerySchema,
+    HeroImportReadSchema,
+    HeroListReadSchema,
+    HeroQuerySchema,
+)
 from src.heroes.service import HeroesService
 
 __all__ = ["heroes_router"]
@@ -20,8 +37,8 @@ heroes_router = APIRouter(prefix="/heroes", tags=["Супер-герои"])
 )
 async def get_heroes_route(
     query: HeroQuerySchema = Query(),
-    session: AsyncSession = Depends(get_session),
-) -> HeroListReadSchema:
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
     """
     Получить список героев с фильтрацией по переданным
     query-параметрам и с учетом пагинации.
@@ -33,7 +50,87 @@ async def get_heroes_route(
         HeroNotFound: Герой не найден `HTTP_404_NOT_FOUND`.
     """
 
-    return await HeroesService.get_heroes(query=query, session=session)
+    content = await HeroesService.get_heroes_json(query=query, session=session)
+    return Response(content=content, media_type="application/json")
+
+
+@heroes_router.get(
+    "/batch",
+    summary="Получить героев по списку id",
+    status_code=status.HTTP_200_OK,
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": HeroBatchReadSchema}},
+)
+async def get_heroes_batch_route(
+    ids: list[Annotated[int, Field(ge=1, le=api_constants.HERO_ID_MAX)]] = Query(
+        min_length=1,
+        max_length=api_constants.HEROES_BATCH_MAX_IDS,
+        description="id героев, например `?ids=69&ids=70`.",
+    ),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    """
+    Получить героев по списку id одним запросом к БД.
+
+    Герои возвращаются в порядке запроса, отсутствующие id
+    перечисляются в `missing`.
+    """
+
+    content = await HeroesService.get_heroes_batch_json(ids=ids, session=session)
+    return Response(content=content, media_type="application/json")
+
+
+@heroes_router.get(
+    "/aggregates",
+    summary="Получить агрегаты героев",
+    status_code=status.HTTP_200_OK,
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": HeroAggregatesReadSchema}},
+)
+async def get_aggregates_route(
+    query: HeroAggregatesQuerySchema = Query(),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    """
+    Получить агрегаты героев, соответствующих фильтрам: число героев
+    по значениям фасетов, сводные статистики и гистограммы характеристик.
+
+    Все агрегаты считаются в БД одним запросом.
+    """
+
+    content = await HeroesService.get_aggregates_json(query=query, session=session)
+    return Response(content=content, media_type="application/json")
+
+
+@heroes_router.get(
+    "/export",
+    summary="Выгрузить героев",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        }
+    },
+)
+async def export_heroes_route(
+    query: HeroExportQuerySchema = Query(),
+) -> StreamingResponse:
+    """
+    Выгрузить всех героев, соответствующих фильтрам, в формате NDJSON или CSV.
+
+    Данные передаются потоком по мере чтения из БД, поэтому время до первого
+    байта и потребление памяти не зависят от числа героев.
+    """
+
+    media_type = "text/csv" if query.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        content=HeroesService.export_heroes(query=query),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="heroes.{query.format}"'
+        },
+    )
 
 
 # MARK: Post
@@ -42,19 +139,28 @@ async def get_heroes_route(
     summary="Создать нового героя",
     status_code=status.HTTP_201_CREATED,
     response_model=None,
-    responses={status.HTTP_201_CREATED: {"model": HeroListReadSchema}},
+    responses={status.HTTP_201_CREATED: {"model": HeroCreateReadSchema}},
 )
 async def create_hero_route(
     name: str = Query(description="Имя героя"),
+    on_conflict: Literal["ignore", "update"] | None = Query(
+        default=None,
+        description="Пропустить (`ignore`) или обновить (`update`) "
+        "уже существующих героев вместо ошибки.",
+    ),
     session: AsyncSession = Depends(get_session),
-) -> HeroListReadSchema:
+) -> HeroCreateReadSchema:
     """
     Создать нового героя.
 
     Выполняется поиск героя по имени в сервисе [SuperHero API](https://superheroapi.com/).
     Если найдены несколько героев, все будут добавлены в БД.
 
-    Возвращаются данные созданных героев.
+    С параметром `on_conflict` уже существующие герои пропускаются или обновляются
+    одним запросом, а в ответе перечисляются id добавленных, обновленных
+    и пропущенных героев.
+
+    Возвращаются данные созданных и обновленных героев.
 
     Raises:
 
@@ -63,4 +169,71 @@ async def create_hero_route(
         HeroAlreadyExists: Герой с переданным именем уже существует в БД `HTTP_409_CONFLICT`.
     """
 
-    return await HeroesService.create_hero(name=name, session=session)
+    return await HeroesService.create_hero(
+        name=name, session=session, on_conflict=on_conflict
+    )
+
+
+@heroes_router.post(
+    "/batch",
+    summary="Создать героев по списку имен",
+    status_code=status.HTTP_200_OK,
+    response_model=HeroBatchCreateReadSchema,
+)
+async def create_heroes_batch_route(
+    data: HeroBatchCreateSchema,
+    session: AsyncSession = Depends(get_session),
+) -> HeroBatchCreateReadSchema:
+    """
+    Создать героев по списку имен.
+
+    Поиск героев в сервисе [SuperHero API](https://superheroapi.com/)
+    выполняется одновременно для нескольких имен, найденные герои
+    записываются в БД одним запросом.
+
+    Ошибки поиска не прерывают запрос: для каждого имени возвращается
+    статус и id найденных героев.
+    """
+
+    return await HeroesService.create_heroes_batch(data=data, session=session)
+
+
+# MARK: Import
+@heroes_router.post(
+    "/import",
+    summary="Массовая загрузка героев",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(verify_admin_token)],
+)
+async def import_heroes_route(
+    request: Request,
+    format: Literal["json", "ndjson"] = Query(
+        default="ndjson", description="Формат тела запроса"
+    ),
+    on_conflict: Literal["ignore", "update"] = Query(
+        default="ignore",
+        description="Пропустить (`ignore`) или обновить (`update`) "
+        "уже существующих героев.",
+    ),
+    session: AsyncSession = Depends(get_session),
+) -> HeroImportReadSchema:
+    """
+    Загрузить героев из тела запроса в формате NDJSON или JSON
+    (массив героев или формат фикстуры `{"heroes": [...]}`).
+
+    Тело запроса читается потоком, записи проверяются и загружаются пачками,
+    поэтому размер файла не ограничен памятью сервера.
+
+    Требуется токен администратора в заголовке `X-Admin-Token`.
+
+    Raises:
+
+        AdminAccessDenied: Доступ запрещен `HTTP_403_FORBIDDEN`.
+        InvalidImportData: Данные не удается разобрать `HTTP_422_UNPROCESSABLE_ENTITY`.
+    """
+
+    return await HeroesService.import_heroes(
+        records=iter_records(request.stream(), format=format),
+        session=session,
+        on_conflict=on_conflict,
+    )
@@ -1,13 +1,52 @@
-from pydantic import BaseModel, ConfigDict, Field, HttpUrl
-
+from functools import lru_cache
+from typing import Annotated, Literal
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    HttpUrl,
+    StringConstraints,
+    create_model,
+    field_validator,
+)
+
+from src import api_constants
 from src.base_schemas import BaseListReadSchema, BaseQuerySchema
 
+HERO_SORT_FIELDS: tuple[str, ...] = ("id", "name", *api_constants.HERO_POWERSTATS)
+
 
 # MARK: Query
-class HeroQuerySchema(BaseQuerySchema):
-    """Схема query-параметров для поиска героев."""
+class HeroFilterSchema(BaseModel):
+    """Схема query-параметров для фильтрации героев."""
 
     name: str | None = None
+    name_contains: str | None = Field(
+        default=None,
+        min_length=1,
+        description="Подстрока имени героя без учета регистра.",
+    )
+    q: str | None = Field(
+        default=None,
+        min_length=1,
+        description="Нечеткий поиск по имени, полному имени и псевдонимам героя. "
+        "Без `sort` герои упорядочиваются по убыванию сходства.",
+    )
+
+    publisher: str | None = Field(
+        default=None, description="Издатель, например `Marvel Comics`."
+    )
+    alignment: str | None = Field(
+        default=None, description="Сторона героя: `good`, `bad` или `neutral`."
+    )
+    gender: str | None = Field(default=None, description="Пол героя.")
+    race: str | None = Field(default=None, description="Раса героя.")
+    group_affiliation: str | None = Field(
+        default=None,
+        description="Принадлежность к группам. Сравнивается полное значение поля "
+        "`connections.group-affiliation`.",
+    )
 
     intelligence: int | None = None
     intelligence_min: int | None = None
@@ -34,6 +73,117 @@ class HeroQuerySchema(BaseQuerySchema):
     combat_max: int | None = None
 
 
+class HeroQuerySchema(HeroFilterSchema, BaseQuerySchema):
+    """Схема query-параметров для поиска героев."""
+
+    fields: str | None = Field(
+        default=None,
+        description="Поля героя через запятую, например `name,powerstats,image.url`. "
+        "Вложенные поля указываются через точку. `id` возвращается всегда.",
+    )
+
+    sort: str | None = Field(
+        default=None,
+        description="Сортировка через запятую в формате `поле:asc|desc`, например "
+        "`strength:desc,name:asc`. Доступны `id`, `name` и характеристики героя. "
+        "`id` добавляется последним ключом для стабильного порядка, "
+        "героев без значения характеристики выводятся в конце.",
+    )
+
+    @field_validator("sort")
+    @classmethod
+    def normalize_sort(cls, value: str | None) -> str | None:
+        """Проверить ключи сортировки и привести их к виду `поле:направление`."""
+
+        if value is None:
+            return None
+        keys = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            field, _, direction = (part.strip() for part in item.partition(":"))
+            direction = direction or "asc"
+            if field not in HERO_SORT_FIELDS:
+                raise ValueError(f"Сортировка по полю `{field}` недоступна.")
+            if direction not in ("asc", "desc"):
+                raise ValueError(f"Некорректное направление сортировки `{direction}`.")
+            if field in keys:
+                raise ValueError(f"Поле `{field}` указано в сортировке повторно.")
+            keys[field] = direction
+        return (
+            ",".join(f"{field}:{direction}" for field, direction in keys.items())
+            or None
+        )
+
+    @property
+    def sort_keys(self) -> list[tuple[str, bool]]:
+        """Поля сортировки и их направление (`True` - по возрастанию)."""
+
+        if not self.sort:
+            return []
+        return [
+            (field, direction == "asc")
+            for field, direction in (item.split(":") for item in self.sort.split(","))
+        ]
+
+    @field_validator("fields")
+    @classmethod
+    def normalize_fields(cls, value: str | None) -> str | None:
+        """
+        Проверить поля героя и привести их к порядку полей `HeroReadSchema`,
+        чтобы одинаковые наборы полей давали одинаковый ключ кеша.
+        """
+
+        if value is None:
+            return None
+        requested = {field.strip() for field in value.split(",") if field.strip()}
+        unknown = requested - set(HERO_FIELDS)
+        if unknown:
+            raise ValueError(f"Неизвестные поля героя: {', '.join(sorted(unknown))}.")
+        return ",".join(field for field in HERO_FIELDS if field in requested)
+
+    @property
+    def selected_fields(self) -> dict[str, tuple[str, ...] | None]:
+        """
+        Выбранные поля героя: поле верхнего уровня и ключи вложенных полей
+        или `None`, если поле выбрано целиком. Без `fields` выбраны все поля.
+        """
+
+        fields = (
+            self.fields.split(",") if self.fields else list(HeroReadSchema.model_fields)
+        )
+        selected: dict[str, tuple[str, ...] | None] = {"id": None}
+        for field in fields:
+            name, _, key = field.partition(".")
+            if not key or selected.get(name, ()) is None:
+                selected[name] = None
+            else:
+                selected[name] = (*selected.get(name, ()), key)
+        return selected
+
+
+class HeroExportQuerySchema(HeroFilterSchema):
+    """Схема query-параметров для выгрузки героев."""
+
+    format: Literal["ndjson", "csv"] = Field(
+        default="ndjson", description="Формат выгрузки."
+    )
+    asc: bool = Field(
+        default=True, description="Порядок сортировки записей по id героя."
+    )
+
+
+class HeroAggregatesQuerySchema(HeroFilterSchema):
+    """Схема query-параметров для агрегатов героев."""
+
+    bucket_size: int = Field(
+        default=api_constants.HERO_HISTOGRAM_BUCKET_SIZE,
+        ge=1,
+        le=100,
+        description="Ширина интервала гистограмм характеристик.",
+    )
+
+
 # MARK: Heroes
 class HeroPowerStatsSchema(BaseModel):
     """Схема характеристик героя."""
@@ -110,7 +260,183 @@ class HeroReadSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Ключи вложенных полей героя, объявленные в схемах (с учетом `alias`)
+HERO_NESTED_KEYS: dict[str, tuple[str, ...]] = {
+    name: tuple(
+        nested.alias or nested_name
+        for nested_name, nested in info.annotation.model_fields.items()
+    )
+    for name, info in HeroReadSchema.model_fields.items()
+    if isinstance(info.annotation, type) and issubclass(info.annotation, BaseModel)
+}
+HERO_FIELDS: tuple[str, ...] = tuple(
+    path
+    for name in HeroReadSchema.model_fields
+    for path in (
+        name,
+        *(f"{name}.{key}" for key in HERO_NESTED_KEYS.get(name, ())),
+    )
+)
+
+
+@lru_cache
+def hero_list_partial_schema(fields: str) -> type[BaseListReadSchema]:
+    """
+    Построить схему списка героев только с выбранными полями героя.
+
+    Args:
+        fields(str): нормализованные поля `HeroQuerySchema.fields`.
+    """
+
+    definitions = {}
+    selected = HeroQuerySchema(fields=fields).selected_fields
+    for name, keys in selected.items():
+        info = HeroReadSchema.model_fields[name]
+        if keys is None:
+            definitions[name] = (info.annotation, ...)
+            continue
+        nested = info.annotation
+        nested_fields = {
+            nested_name: (nested_info.annotation, nested_info)
+            for nested_name, nested_info in nested.model_fields.items()
+            if (nested_info.alias or nested_name) in keys
+        }
+        definitions[name] = (
+            create_model(
+                f"{nested.__name__}Partial",
+                __config__=nested.model_config,
+                **nested_fields,
+            ),
+            ...,
+        )
+    hero_schema = create_model(
+        "HeroPartialReadSchema", __config__=HeroReadSchema.model_config, **definitions
+    )
+    return create_model(
+        "HeroPartialListReadSchema",
+        __base__=BaseListReadSchema,
+        heroes=(list[hero_schema], ...),
+    )
+
+
 class HeroListReadSchema(BaseListReadSchema):
     """Схема для отображения героев в списке."""
 
     heroes: list[HeroReadSchema]
+
+
+class HeroBatchReadSchema(BaseModel):
+    """Схема для отображения героев, полученных по списку id."""
+
+    heroes: list[HeroReadSchema] = Field(
+        description="Найденные герои в порядке запроса."
+    )
+    missing: list[int] = Field(description="id героев, отсутствующих в БД.")
+
+
+class HeroCreateReadSchema(HeroListReadSchema):
+    """Схема для отображения созданных героев."""
+
+    inserted: list[int] = Field(default=[], description="id добавленных героев.")
+    updated: list[int] = Field(default=[], description="id обновленных героев.")
+    skipped: list[int] = Field(
+        default=[], description="id пропущенных, уже существующих героев."
+    )
+
+
+class HeroStatSummarySchema(BaseModel):
+    """Схема сводных статистик характеристики героев."""
+
+    count: int = Field(description="Число героев с известным значением.")
+    min: int | None
+    max: int | None
+    avg: float | None
+    percentiles: dict[str, float | None] = Field(
+        description="Процентили, например `p50` - медиана."
+    )
+
+
+class HeroFacetBucketSchema(BaseModel):
+    """Схема значения фасета героев."""
+
+    value: str | None
+    count: int
+    avg: dict[str, float | None] = Field(
+        description="Средние значения характеристик героев с этим значением."
+    )
+
+
+class HeroHistogramBucketSchema(BaseModel):
+    """Схема интервала гистограммы характеристики героев."""
+
+    start: int = Field(description="Нижняя граница интервала включительно.")
+    count: int
+
+
+class HeroAggregatesReadSchema(BaseModel):
+    """Схема агрегатов героев, соответствующих фильтрам."""
+
+    count: int = Field(description="Число героев, соответствующих фильтрам.")
+    powerstats: dict[str, HeroStatSummarySchema]
+    facets: dict[str, list[HeroFacetBucketSchema]] = Field(
+        description="Значения фасетов по убыванию числа героев."
+    )
+    histograms: dict[str, list[HeroHistogramBucketSchema]] = Field(
+        description="Гистограммы характеристик, герои без значения не учитываются."
+    )
+
+
+class HeroBatchCreateSchema(BaseModel):
+    """Схема для создания героев по списку имен."""
+
+    names: list[
+        Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+    ] = Field(
+        min_length=1,
+        max_length=api_constants.HEROES_BATCH_MAX_NAMES,
+        description="Имена героев для поиска в SuperHero API.",
+    )
+    on_conflict: Literal["ignore", "update"] = Field(
+        default="ignore",
+        description="Пропустить (`ignore`) или обновить (`update`) "
+        "уже существующих героев.",
+    )
+
+
+class HeroBatchCreateResultSchema(BaseModel):
+    """Схема результата создания героев по одному имени."""
+
+    name: str
+    status: Literal["created", "exists", "not_found", "unavailable", "error"] = Field(
+        description="`created` - добавлен или обновлен хотя бы один герой, "
+        "`exists` - все найденные герои уже есть в БД, `not_found` - герой "
+        "не найден, `unavailable` - сервис SuperHero API не доступен, "
+        "`error` - не удалось обработать ответ SuperHero API."
+    )
+    ids: list[int] = Field(default=[], description="id найденных героев.")
+
+
+class HeroBatchCreateReadSchema(BaseModel):
+    """Схема для отображения результатов создания героев по списку имен."""
+
+    results: list[HeroBatchCreateResultSchema] = Field(
+        description="Результаты в порядке переданных имен."
+    )
+    inserted: list[int] = Field(description="id добавленных героев.")
+    updated: list[int] = Field(description="id обновленных героев.")
+    skipped: list[int] = Field(description="id пропущенных, уже существующих героев.")
+
+
+class HeroImportReadSchema(BaseModel):
+    """Схема отчета о массовой загрузке героев."""
+
+    rows: int = Field(description="Число прочитанных записей.")
+    invalid: int = Field(description="Число записей, не прошедших проверку.")
+    inserted: int = Field(description="Число добавленных героев.")
+    updated: int = Field(description="Число обновленных героев.")
+    skipped: int = Field(description="Число пропущенных, уже существующих героев.")
+    errors: list[str] = Field(
+        description="Ошибки проверки первых некорректных записей."
+    )
+    elapsed: float = Field(description="Длительность загрузки, с.")
+    rows_per_second: float = Field(description="Скорость загрузки, записей в секунду.")
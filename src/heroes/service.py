@@ -1,13 +1,70 @@
-import aiohttp
-from fastapi import status
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Literal
+
+from pydantic import ValidationError
+from sqlalchemy import func, literal
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src import exceptions
+from src import api_constants, exceptions, pagination
+from src.base_schemas import BaseListReadSchema
+from src.cache import TTLCache
 from src.config import api_settings
-from src.heroes.dao import HeroDAO
+from src.dao import BulkWriteResult
+from src.database import SessionLocal
+from src.heroes.dao import HeroDAO, SuperHeroAPICacheDAO
+from src.heroes.importer import prepare_record
 from src.heroes.models import HeroModel
-from src.heroes.schemas import HeroListReadSchema, HeroQuerySchema
+from src.heroes.schemas import (
+    HERO_NESTED_KEYS,
+    HeroAggregatesQuerySchema,
+    HeroAggregatesReadSchema,
+    HeroBatchCreateReadSchema,
+    HeroBatchCreateResultSchema,
+    HeroBatchCreateSchema,
+    HeroCreateReadSchema,
+    HeroExportQuerySchema,
+    HeroFacetBucketSchema,
+    HeroHistogramBucketSchema,
+    HeroImportReadSchema,
+    HeroListReadSchema,
+    HeroQuerySchema,
+    HeroReadSchema,
+    HeroStatSummarySchema,
+    hero_list_partial_schema,
+)
+from src.replicas import read_replicas
+from src.singleflight import SingleFlight
+from src.superhero_api import superhero_client
+
+heroes_cache: TTLCache[bytes] = TTLCache(
+    maxsize=api_settings.HEROES_CACHE_SIZE, ttl=api_settings.HEROES_CACHE_TTL
+)
+
+upstream_cache: TTLCache[list[dict]] = TTLCache(
+    maxsize=api_settings.SUPERHERO_API_CACHE_SIZE,
+    ttl=api_settings.SUPERHERO_API_CACHE_TTL,
+)
+
+create_flights: SingleFlight[HeroCreateReadSchema] = SingleFlight()
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_heroes_cache() -> None:
+    """
+    Сбросить кеш героев после записи. Чтение на время отставания реплик
+    переключается на основную БД, чтобы кеш не заполнился данными до записи.
+    Кеш и переключение чтения действуют только в текущем процессе.
+    """
+
+    read_replicas.mark_write()
+    heroes_cache.invalidate()
 
 
 class HeroesService:
@@ -19,40 +76,203 @@ class HeroesService:
 
     # MARK: Utils
     @classmethod
-    async def _fetch_from_superhero_api(cls, name: str) -> list[dict]:
+    async def _fetch_from_superhero_api(
+        cls, name: str, refresh: bool = False
+    ) -> list[dict]:
         """
         Получить данные героя по его имени в сервисе
         [SuperHero API](https://superheroapi.com/).
 
+        Args:
+            name(str): имя героя.
+            refresh(bool): запросить сервис без чтения кеша и обновить кеш,
+                например для обновления существующих героев.
+
         Raises:
             SuperHeroAPINotAvailable: Сервис SuperHeroAPI не доступен `HTTP_503_SERVICE_UNAVAILABLE`.
             HeroNotFound: Герой не найден `HTTP_404_NOT_FOUND`.
         """
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url=f"https://superheroapi.com/api/{api_settings.SUPERHERO_API_TOKEN}/search/{name}"
-            ) as response:
-                if response.status != status.HTTP_200_OK:
-                    raise exceptions.SuperHeroAPINotAvailable
-                heroes_data = await response.json()
-                if (
-                    heroes_data.get("error", "")
-                    == "character with given name not found"
-                ):
-                    raise exceptions.HeroNotFound
-                return heroes_data["results"]
+        key = name.strip().casefold()
+        results = None if refresh else await cls._get_cached_search(key=key)
+        if results is None:
+            heroes_data = await superhero_client.search(name=name)
+            if heroes_data.get("error", "") == "character with given name not found":
+                results = []
+            else:
+                results = heroes_data["results"]
+            await cls._cache_search(key=key, results=results)
+
+        # Пустой список - закешированный ответ "герой не найден"
+        if not results:
+            raise exceptions.HeroNotFound
+        return results
+
+    @classmethod
+    async def _get_cached_search(cls, key: str) -> list[dict] | None:
+        """
+        Получить результаты поиска в SuperHero API из кеша в памяти или,
+        если включено `SUPERHERO_API_CACHE_PERSISTENT`, из кеша в БД.
+        """
+
+        results = upstream_cache.get(key)
+        if results is None and api_settings.SUPERHERO_API_CACHE_PERSISTENT:
+            async with SessionLocal() as session:
+                cached = await SuperHeroAPICacheDAO.find_valid(key=key, session=session)
+            if cached is not None:
+                results, ttl = cached
+                upstream_cache.set(key, results, ttl=ttl)
+        return results
+
+    @classmethod
+    async def _cache_search(cls, key: str, results: list[dict]) -> None:
+        """
+        Сохранить результаты поиска в SuperHero API в кеш.
+
+        Для ответа "герой не найден" используется отдельное время жизни.
+        Запись в БД выполняется в отдельной транзакции, чтобы не зависеть
+        от результата создания героев.
+        """
+
+        ttl = (
+            api_settings.SUPERHERO_API_CACHE_TTL
+            if results
+            else api_settings.SUPERHERO_API_CACHE_NEGATIVE_TTL
+        )
+        upstream_cache.set(key, results, ttl=ttl)
+        if api_settings.SUPERHERO_API_CACHE_PERSISTENT:
+            async with SessionLocal() as session:
+                await SuperHeroAPICacheDAO.put(
+                    key=key, results=results, ttl=ttl, session=session
+                )
+                await session.commit()
+
+    @classmethod
+    def _prepare_heroes_data(cls, results: list[dict]) -> list[dict]:
+        """
+        Подготовить героев из ответа SuperHero API к записи в БД.
+
+        В БД записываются только поля ответа SuperHero API,
+        вычисляемые колонки характеристик заполняет Postgres.
+
+        Raises:
+            SuperHeroAPINotAvailable: В ответе SuperHero API нет полей героя
+                или некорректный id `HTTP_503_SERVICE_UNAVAILABLE`.
+        """
+
+        try:
+            heroes_data = [
+                {field: hero_data[field] for field in HeroReadSchema.model_fields}
+                for hero_data in results
+            ]
+            for hero_data in heroes_data:
+                hero_data["id"] = int(hero_data["id"])
+        except (KeyError, TypeError, ValueError) as ex:
+            raise exceptions.SuperHeroAPINotAvailable from ex
+        return heroes_data
+
+    @classmethod
+    def _get_order_by(cls, query: HeroQuerySchema) -> list:
+        """
+        Подготовить ключи сортировки героев по параметру `sort`.
+        При нечетком поиске без `sort` герои сортируются по убыванию сходства.
+        """
+
+        order_by = []
+        for field, asc in query.sort_keys:
+            key = (
+                HeroModel.powerstat_sort_key(field)
+                if field in api_constants.HERO_POWERSTATS
+                else getattr(HeroModel, field)
+            )
+            order_by.append(key.asc() if asc else key.desc())
+        if not order_by and query.q is not None:
+            order_by.append(HeroDAO.search_rank(query.q).desc())
+        return order_by or [HeroModel.id]
+
+    @classmethod
+    def _get_columns(cls, fields: dict[str, tuple[str, ...] | None]) -> list:
+        """
+        Подготовить колонки для выбранных полей героя.
+
+        Из вложенных полей извлекаются только выбранные ключи JSONB,
+        поэтому остальные данные не передаются из БД. Для поля, выбранного
+        целиком, извлекаются ключи, объявленные в схеме героя: ключи JSONB
+        вне схемы не попадают в ответ.
+        """
+
+        columns = []
+        for name, keys in fields.items():
+            column = getattr(HeroModel, name)
+            keys = keys or HERO_NESTED_KEYS.get(name)
+            if keys is None:
+                columns.append(column)
+            else:
+                columns.append(
+                    func.json_build_object(
+                        *(arg for key in keys for arg in (literal(key), column[key]))
+                    ).label(name)
+                )
+        return columns
+
+    @classmethod
+    def _get_cursors(
+        cls,
+        heroes: list[tuple[list[Any], str]],
+        has_more: bool,
+        has_previous: bool,
+        backward: bool,
+        signature: str,
+    ) -> dict[str, str | None]:
+        """
+        Подготовить курсоры соседних страниц.
+
+        Args:
+            heroes(list[tuple[list[Any], str]]): значения ключей сортировки
+                и JSON героев текущей страницы.
+            has_more(bool): есть ли записи дальше в направлении выборки.
+            has_previous(bool): есть ли записи перед текущей страницей.
+            backward(bool): выполнялась ли выборка назад по курсору `before`.
+            signature(str): подпись сортировки, см. `BaseDAO.sort_signature`.
+        """
+
+        if not heroes:
+            return {"next_cursor": None, "prev_cursor": None}
+
+        if backward:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, has_previous
+
+        first, last = heroes[0][0], heroes[-1][0]
+        return {
+            "next_cursor": pagination.encode_cursor(last, signature)
+            if has_next
+            else None,
+            "prev_cursor": pagination.encode_cursor(first, signature)
+            if has_prev
+            else None,
+        }
 
     # MARK: Create
     @classmethod
-    async def create_hero(cls, name: str, session: AsyncSession) -> HeroListReadSchema:
+    async def create_hero(
+        cls,
+        name: str,
+        session: AsyncSession,
+        on_conflict: Literal["ignore", "update"] | None = None,
+    ) -> HeroCreateReadSchema:
         """
         Создать нового героя.
 
         Выполняется поиск героя по имени в сервисе [SuperHero API](https://superheroapi.com/).
         Если найдены несколько героев, все будут добавлены в БД.
 
-        Возвращаются данные созданных героев.
+        При передаче `on_conflict` уже существующие герои пропускаются (`ignore`)
+        или обновляются (`update`) вместо ошибки `HeroAlreadyExists`.
+        Для обновления данные запрашиваются в SuperHero API без кеша.
+
+        Возвращаются данные созданных и обновленных героев.
 
         Raises:
             SuperHeroAPINotAvailable: Сервис SuperHeroAPI не доступен `HTTP_503_SERVICE_UNAVAILABLE`.
@@ -60,43 +280,489 @@ class HeroesService:
             HeroAlreadyExists: Герой с переданным именем уже существует в БД `HTTP_409_CONFLICT`.
         """
 
-        heroes_data = await cls._fetch_from_superhero_api(name=name)
-        for hero_data in heroes_data:
-            hero_data["id"] = int(hero_data["id"])
+        # Одновременные запросы с одинаковым именем выполняют один запрос
+        # к SuperHero API и одну вставку и получают общий результат
+        return await create_flights.do(
+            (name.strip().casefold(), on_conflict),
+            lambda: cls._create_hero(
+                name=name, session=session, on_conflict=on_conflict
+            ),
+        )
+
+    @classmethod
+    async def _create_hero(
+        cls,
+        name: str,
+        session: AsyncSession,
+        on_conflict: Literal["ignore", "update"] | None,
+    ) -> HeroCreateReadSchema:
+        """
+        Создать нового героя без объединения одновременных запросов.
+
+        В режиме `HEROES_CREATE_LOCK=advisory` создание героев с одинаковым
+        именем сериализуется между процессами advisory-блокировкой Postgres.
+        Если после ее получения герой с таким именем (без учета регистра
+        и пробелов по краям) уже есть в БД, запрос к SuperHero API не выполняется.
+        Блокировка удерживается до конца транзакции, включая запрос
+        к SuperHero API, и все это время занимает соединение из пула.
+        """
+
+        if api_settings.HEROES_CREATE_LOCK == "advisory":
+            key = name.strip().casefold()
+            await HeroDAO.advisory_xact_lock(key, session=session)
+            if on_conflict is None and await HeroDAO.count(
+                func.lower(func.trim(HeroModel.name)) == key, session=session
+            ):
+                raise exceptions.HeroAlreadyExists
+
+        heroes_data = cls._prepare_heroes_data(
+            await cls._fetch_from_superhero_api(
+                name=name, refresh=on_conflict == "update"
+            )
+        )
+
+        if on_conflict is None:
+            try:
+                await HeroDAO.add_bulk(session=session, data=heroes_data)
+            except IntegrityError as ex:
+                raise exceptions.HeroAlreadyExists from ex
+            result = BulkWriteResult(
+                inserted=[hero_data["id"] for hero_data in heroes_data],
+                updated=[],
+                skipped=[],
+            )
+        else:
+            result = await HeroDAO.add_bulk(
+                session=session, data=heroes_data, on_conflict=on_conflict
+            )
+
+        await session.commit()
+        if result.inserted or result.updated:
+            invalidate_heroes_cache()
+
+        written = {*result.inserted, *result.updated}
+        heroes = {hero_data["id"]: hero_data for hero_data in heroes_data}
+        return HeroCreateReadSchema(
+            count=len(written),
+            heroes=[heroes[hero_id] for hero_id in heroes if hero_id in written],
+            **result._asdict(),
+        )
+
+    @classmethod
+    async def create_heroes_batch(
+        cls, data: HeroBatchCreateSchema, session: AsyncSession
+    ) -> HeroBatchCreateReadSchema:
+        """
+        Создать героев по списку имен.
+
+        Поиск в [SuperHero API](https://superheroapi.com/) выполняется
+        одновременно не более чем для `HEROES_BATCH_CONCURRENCY` имен,
+        ошибки поиска и обработки ответа фиксируются для каждого имени отдельно. Найденные герои
+        объединяются по id и записываются в БД одним запросом.
+        """
+
+        semaphore = asyncio.Semaphore(api_settings.HEROES_BATCH_CONCURRENCY)
+        keys = list(dict.fromkeys(name.strip().casefold() for name in data.names))
+
+        async def fetch(key: str) -> list[dict] | str:
+            async with semaphore:
+                try:
+                    return cls._prepare_heroes_data(
+                        await cls._fetch_from_superhero_api(
+                            name=key, refresh=data.on_conflict == "update"
+                        )
+                    )
+                except exceptions.HeroNotFound:
+                    return "not_found"
+                except exceptions.SuperHeroAPINotAvailable:
+                    return "unavailable"
+                except Exception:
+                    # Ошибка одного имени не прерывает обработку остальных
+                    logger.exception("Не удалось создать героев по имени %r", key)
+                    return "error"
+
+        fetched = dict(zip(keys, await asyncio.gather(*map(fetch, keys)), strict=True))
 
+        heroes = {
+            hero_data["id"]: hero_data
+            for found in fetched.values()
+            if isinstance(found, list)
+            for hero_data in found
+        }
+        result = BulkWriteResult(inserted=[], updated=[], skipped=[])
+        if heroes:
+            result = await HeroDAO.add_bulk(
+                session=session,
+                data=list(heroes.values()),
+                on_conflict=data.on_conflict,
+            )
+            await session.commit()
+            if result.inserted or result.updated:
+                invalidate_heroes_cache()
+
+        written = {*result.inserted, *result.updated}
+        results = []
+        for name in data.names:
+            found = fetched[name.strip().casefold()]
+            if isinstance(found, str):
+                results.append(HeroBatchCreateResultSchema(name=name, status=found))
+                continue
+            ids = [hero_data["id"] for hero_data in found]
+            results.append(
+                HeroBatchCreateResultSchema(
+                    name=name,
+                    status="created" if written.intersection(ids) else "exists",
+                    ids=ids,
+                )
+            )
+        return HeroBatchCreateReadSchema(results=results, **result._asdict())
+
+    # MARK: Import
+    @classmethod
+    async def import_heroes(
+        cls,
+        records: AsyncIterable[Any],
+        session: AsyncSession,
+        on_conflict: Literal["ignore", "update"] = "ignore",
+        batch_size: int = api_constants.HEROES_IMPORT_BATCH_SIZE,
+    ) -> HeroImportReadSchema:
+        """
+        Загрузить героев из потока записей.
+
+        Записи проверяются по схеме `HeroReadSchema` и пачками по `batch_size`
+        записываются протоколом `COPY` во временную таблицу, после чего одним
+        запросом переносятся в `heroes`. Некорректные записи пропускаются.
+        В памяти одновременно находится не более одной пачки записей.
+
+        Raises:
+            InvalidImportData: Данные не удается разобрать
+                `HTTP_422_UNPROCESSABLE_ENTITY`.
+        """
+
+        started_at = time.perf_counter()
+        rows, invalid, errors, batch = 0, 0, [], []
+
+        await HeroDAO.create_import_staging(session=session)
         try:
-            await HeroDAO.add_bulk(session=session, data=heroes_data)
-        except IntegrityError as ex:
-            raise exceptions.HeroAlreadyExists from ex
+            async for record in records:
+                rows += 1
+                try:
+                    batch.append((rows, *prepare_record(record)))
+                except (ValidationError, ValueError) as ex:
+                    invalid += 1
+                    if len(errors) < api_constants.HEROES_IMPORT_MAX_ERRORS:
+                        errors.append(f"Запись {rows}: {ex}")
+                if len(batch) >= batch_size:
+                    await HeroDAO.copy_to_import_staging(records=batch, session=session)
+                    batch = []
+        except exceptions.InvalidImportData:
+            await HeroDAO.drop_import_staging(session=session)
+            raise
+        if batch:
+            await HeroDAO.copy_to_import_staging(records=batch, session=session)
 
+        inserted, updated, skipped = await HeroDAO.merge_import_staging(
+            session=session, on_conflict=on_conflict
+        )
         await session.commit()
+        if inserted or updated:
+            invalidate_heroes_cache()
+
+        elapsed = time.perf_counter() - started_at
+        return HeroImportReadSchema(
+            rows=rows,
+            invalid=invalid,
+            inserted=inserted,
+            updated=updated,
+            skipped=skipped,
+            errors=errors,
+            elapsed=round(elapsed, 3),
+            rows_per_second=round(rows / elapsed, 1) if elapsed else 0.0,
+        )
+
+    # MARK: Export
+    @classmethod
+    async def export_heroes(cls, query: HeroExportQuerySchema) -> AsyncIterator[bytes]:
+        """
+        Выгрузить всех героев, соответствующих фильтрам, в формате NDJSON или CSV.
+
+        Данные формируются частями по мере чтения из БД серверным курсором.
+        Сессия создается внутри генератора, т.к. ответ передается
+        после завершения обработчика запроса, и открывается на реплике,
+        если она доступна.
+
+        В CSV поля JSONB записываются JSON строками, как в фикстуре
+        `alembic/fixtures/heroes.json`.
+        """
 
-        return HeroListReadSchema(count=len(heroes_data), heroes=heroes_data)
+        fields = list(HeroReadSchema.model_fields)
+        columns = [getattr(HeroModel, field) for field in fields]
+
+        if query.format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            yield buffer.getvalue().encode()
+
+        async with read_replicas.session() as session:
+            async for partition in HeroDAO.stream_all_sorted(
+                *HeroDAO.prepare_filters_by_query(query=query),
+                session=session,
+                columns=columns,
+                order_by=HeroModel.id,
+                asc=query.asc,
+            ):
+                if query.format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(
+                        [
+                            value if field in ("id", "name") else json.dumps(value)
+                            for field, value in row._asdict().items()
+                        ]
+                        for row in partition
+                    )
+                    yield buffer.getvalue().encode()
+                else:
+                    yield "".join(
+                        json.dumps(row._asdict()) + "\n" for row in partition
+                    ).encode()
 
     # MARK: Read
     @classmethod
     async def get_heroes(
         cls, query: HeroQuerySchema, session: AsyncSession
-    ) -> HeroListReadSchema:
+    ) -> BaseListReadSchema:
         """
         Получить список героев с фильтрацией по переданным
         query-параметрам и с учетом пагинации.
 
+        При переданных `fields` возвращается схема только с выбранными полями.
+
+        Raises:
+            HeroNotFound: Герой не найден `HTTP_404_NOT_FOUND`.
+        """
+
+        content = await cls.get_heroes_json(query=query, session=session)
+        if query.fields:
+            return hero_list_partial_schema(query.fields).model_validate_json(content)
+        return HeroListReadSchema.model_validate_json(content)
+
+    @classmethod
+    async def get_heroes_json(
+        cls, query: HeroQuerySchema, session: AsyncSession
+    ) -> bytes:
+        """
+        Получить сериализованный в JSON список героев.
+
+        Ответы кешируются в памяти процесса по нормализованным
+        query-параметрам и сбрасываются при добавлении героев.
+        Данные реплики, которая могла еще не получить запись, не кешируются.
+
+        Raises:
+            HeroNotFound: Герой не найден `HTTP_404_NOT_FOUND`.
+        """
+
+        key = json.dumps(query.model_dump(), sort_keys=True)
+        content = heroes_cache.get(key)
+        if content is None:
+            generation = heroes_cache.generation
+            content = await cls._get_heroes_page_json(query=query, session=session)
+            if read_replicas.is_fresh(session):
+                heroes_cache.set(key, content, generation=generation)
+        return content
+
+    @classmethod
+    async def _get_heroes_page_json(
+        cls, query: HeroQuerySchema, session: AsyncSession
+    ) -> bytes:
+        """
+        Получить страницу героев в формате `HeroListReadSchema`.
+
+        JSON героев формируется в Postgres и встраивается в ответ без
+        создания ORM объектов и повторной валидации Pydantic схемами.
+
         Raises:
             HeroNotFound: Герой не найден `HTTP_404_NOT_FOUND`.
         """
 
         filters = HeroDAO.prepare_filters_by_query(query=query)
-        count = await HeroDAO.count(*filters, session=session)
-        if count:
-            heroes = await HeroDAO.find_all_sorted(
-                *filters,
-                session=session,
-                order_by=HeroModel.id,
-                offset=query.offset,
-                limit=query.limit,
-                asc=query.asc,
-            )
-            return HeroListReadSchema(count=count, heroes=heroes)
-        else:
+        order_by = cls._get_order_by(query)
+        signature = HeroDAO.sort_signature(order_by)
+        after = before = None
+        if query.after:
+            after = pagination.decode_cursor(query.after, signature)
+        if query.before:
+            before = pagination.decode_cursor(query.before, signature)
+
+        heroes, count = await HeroDAO.find_json_sorted(
+            *filters,
+            session=session,
+            columns=cls._get_columns(query.selected_fields),
+            order_by=order_by,
+            offset=query.offset,
+            # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+            limit=query.limit + 1 if query.limit is not None else None,
+            asc=query.asc,
+            after=after,
+            before=before,
+            with_count=query.include_count,
+        )
+        has_more = query.limit is not None and len(heroes) > query.limit
+        if has_more:
+            heroes = heroes[1:] if before is not None else heroes[:-1]
+
+        if count is None:
+            if heroes or query.offset or after is not None or before is not None:
+                estimate = await HeroDAO.estimate_count(*filters, session=session)
+                count = max(estimate, (query.offset or 0) + len(heroes))
+            else:
+                count = 0
+
+        if not count:
             raise exceptions.HeroNotFound
+
+        envelope = {
+            "count": count,
+            "count_estimated": not query.include_count,
+            **cls._get_cursors(
+                heroes=heroes,
+                has_more=has_more,
+                has_previous=bool(after is not None or query.offset),
+                backward=before is not None,
+                signature=signature,
+            ),
+        }
+        return (
+            json.dumps(envelope)[:-1]
+            + ', "heroes": ['
+            + ", ".join(hero for _, hero in heroes)
+            + "]}"
+        ).encode()
+
+    # MARK: Batch
+    @classmethod
+    async def get_heroes_batch_json(
+        cls, ids: list[int], session: AsyncSession
+    ) -> bytes:
+        """
+        Получить сериализованных в JSON героев по списку id одним запросом.
+
+        Герои возвращаются в порядке запроса без повторов, отсутствующие
+        в БД id перечисляются в `missing` вместо ошибки `HTTP_404_NOT_FOUND`.
+        """
+
+        ids = list(dict.fromkeys(ids))
+        heroes = await HeroDAO.find_json_by_ids(
+            ids,
+            session=session,
+            columns=cls._get_columns(dict.fromkeys(HeroReadSchema.model_fields)),
+        )
+        return (
+            '{"heroes": ['
+            + ", ".join(heroes[hero_id] for hero_id in ids if hero_id in heroes)
+            + '], "missing": '
+            + json.dumps([hero_id for hero_id in ids if hero_id not in heroes])
+            + "}"
+        ).encode()
+
+    # MARK: Aggregates
+    @classmethod
+    async def get_aggregates_json(
+        cls, query: HeroAggregatesQuerySchema, session: AsyncSession
+    ) -> bytes:
+        """
+        Получить сериализованные в JSON агрегаты героев, соответствующих фильтрам.
+
+        Ответы кешируются вместе со страницами списка героев
+        и сбрасываются при добавлении героев.
+        """
+
+        key = "aggregates:" + json.dumps(query.model_dump(), sort_keys=True)
+        content = heroes_cache.get(key)
+        if content is None:
+            generation = heroes_cache.generation
+            aggregates = await cls.get_aggregates(query=query, session=session)
+            content = aggregates.model_dump_json().encode()
+            if read_replicas.is_fresh(session):
+                heroes_cache.set(key, content, generation=generation)
+        return content
+
+    @classmethod
+    async def get_aggregates(
+        cls, query: HeroAggregatesQuerySchema, session: AsyncSession
+    ) -> HeroAggregatesReadSchema:
+        """
+        Посчитать фасеты, статистики и гистограммы характеристик героев,
+        соответствующих фильтрам, одним запросом к БД.
+        """
+
+        rows = await HeroDAO.aggregate(
+            *HeroDAO.prepare_filters_by_query(query=query),
+            session=session,
+            bucket_size=query.bucket_size,
+        )
+        facets = {facet: [] for facet in api_constants.HERO_FACETS}
+        histograms = {stat: [] for stat in api_constants.HERO_POWERSTATS}
+        count, powerstats = 0, {}
+
+        for row in rows:
+            facet = next(
+                (f for f in api_constants.HERO_FACETS if not row[f"grouping_{f}"]), None
+            )
+            stat = next(
+                (
+                    s
+                    for s in api_constants.HERO_POWERSTATS
+                    if not row[f"grouping_{s}_bucket"]
+                ),
+                None,
+            )
+            if facet is not None:
+                facets[facet].append(
+                    HeroFacetBucketSchema(
+                        value=row[facet],
+                        count=row["count"],
+                        avg={s: row[f"{s}_avg"] for s in api_constants.HERO_POWERSTATS},
+                    )
+                )
+            elif stat is not None:
+                # Герои без значения характеристики не попадают в гистограмму
+                if row[f"{stat}_bucket"] is not None:
+                    histograms[stat].append(
+                        HeroHistogramBucketSchema(
+                            start=row[f"{stat}_bucket"], count=row["count"]
+                        )
+                    )
+            else:
+                count = row["count"]
+                powerstats = {
+                    s: HeroStatSummarySchema(
+                        count=row[f"{s}_count"],
+                        min=row[f"{s}_min"],
+                        max=row[f"{s}_max"],
+                        avg=row[f"{s}_avg"],
+                        percentiles=dict(
+                            zip(
+                                (
+                                    f"p{round(p * 100)}"
+                                    for p in api_constants.HERO_STATS_PERCENTILES
+                                ),
+                                # `NULL`, если у героев нет значений характеристики
+                                row[f"{s}_percentiles"]
+                                or [None] * len(api_constants.HERO_STATS_PERCENTILES),
+                                strict=True,
+                            )
+                        ),
+                    )
+                    for s in api_constants.HERO_POWERSTATS
+                }
+
+        for buckets in facets.values():
+            buckets.sort(key=lambda bucket: (-bucket.count, bucket.value or ""))
+        for buckets in histograms.values():
+            buckets.sort(key=lambda bucket: bucket.start)
+
+        return HeroAggregatesReadSchema(
+            count=count, powerstats=powerstats, facets=facets, histograms=histograms
+        )
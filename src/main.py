@@ -1,14 +1,38 @@
 """Модуль конфигурации FastAPI."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse
 
 from src import api_constants
+from src.config import api_settings
+from src.database import EngineLocal
 from src.heroes.router import heroes_router
+from src.heroes.service import heroes_cache, upstream_cache
+from src.metrics import MetricsMiddleware, render_metrics
+from src.pool import InstrumentedAsyncQueuePool
+from src.profiling import ProfilingMiddleware
+from src.replicas import read_replicas
+from src.superhero_api import superhero_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Создать общие ресурсы при запуске приложения и освободить при остановке."""
+
+    await superhero_client.start()
+    yield
+    await superhero_client.close()
+    await read_replicas.dispose()
+
 
 app = FastAPI(
-    title="SuperHero API", swagger_ui_parameters={"operationsSorter": "method"}
+    title="SuperHero API",
+    swagger_ui_parameters={"operationsSorter": "method"},
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -17,10 +41,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=api_constants.CORS_METHODS,
 )
+if api_settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(heroes_router, prefix="/api/v1")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Метрики API в текстовом формате Prometheus."""
+
+    gauges = {
+        "heroes_cache": heroes_cache.stats(),
+        "superhero_api_cache": upstream_cache.stats(),
+    }
+    if isinstance(EngineLocal.pool, InstrumentedAsyncQueuePool):
+        gauges["db_pool"] = EngineLocal.pool.stats()
+    if read_replicas.replicas:
+        gauges["db_replicas"] = read_replicas.stats()
+    return PlainTextResponse(
+        content=render_metrics(gauges=gauges),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/metrics/cache", include_in_schema=False)
+def cache_metrics() -> dict:
+    """Счетчики кеша списков героев."""
+
+    return {"heroes": heroes_cache.stats()}
+
+
+@app.get("/metrics/pool", include_in_schema=False)
+def pool_metrics() -> dict:
+    """Состояние и метрики пула соединений с Postgres."""
+
+    pool = EngineLocal.pool
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        return pool.stats()
+    # Без пула на стороне приложения (`DB_APP_POOL=null`) метрик нет
+    return {"status": pool.status()}
+
+
+@app.get("/metrics/replicas", include_in_schema=False)
+def replicas_metrics() -> dict:
+    """Состояние реплик Postgres для запросов на чтение."""
+
+    return read_replicas.stats()
+
+
 @app.get(
     "/",
     response_class=HTMLResponse,
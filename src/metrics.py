@@ -0,0 +1,303 @@
+"""
+Модуль метрик API в текстовом формате Prometheus.
+
+Гистограммы хранятся в памяти процесса: наблюдение - это поиск интервала
+и увеличение счетчиков, без блокировок и внешних зависимостей.
+"""
+
+import bisect
+import functools
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+__all__ = [
+    "Histogram",
+    "MetricsMiddleware",
+    "db_statement_duration",
+    "instrument_engine",
+    "render_metrics",
+    "request_db_time",
+    "upstream_request_duration",
+]
+
+# Верхние границы интервалов гистограмм времени, с
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Верхние границы интервалов гистограмм размера, байт
+SIZE_BUCKETS: tuple[float, ...] = (
+    100,
+    1_000,
+    10_000,
+    100_000,
+    1_000_000,
+    10_000_000,
+)
+# Ограничение числа наборов меток одной гистограммы,
+# остальные наблюдения учитываются с метками `OTHER_LABEL`
+MAX_SERIES: int = 1000
+OTHER_LABEL: str = "other"
+UNMATCHED_ROUTE: str = "unmatched"
+
+# Суммарное время запросов к БД в рамках текущего HTTP запроса, с
+request_db_time: ContextVar[list[float] | None] = ContextVar(
+    "request_db_time", default=None
+)
+
+
+class Histogram:
+    """
+    Гистограмма с метками в формате Prometheus.
+
+    Для каждого набора значений меток хранятся счетчики интервалов
+    (не накопительные, накапливаются при выводе), сумма и число наблюдений.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        max_series: int = MAX_SERIES,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.max_series = max_series
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учесть наблюдение `value` с метками `labels`."""
+
+        series = self._series.get(labels)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                labels = (OTHER_LABEL,) * len(self.labelnames)
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 3))
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def reset(self) -> None:
+        """Удалить все наблюдения."""
+
+        self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        """Строки гистограммы в текстовом формате Prometheus."""
+
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = (*map(repr, map(float, self.buckets)), "+Inf")
+        for labels, series in list(self._series.items()):
+            label_pairs = [
+                f'{name}="{escape_label(value)}"'
+                for name, value in zip(self.labelnames, labels, strict=True)
+            ]
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-2], strict=True):
+                cumulative += count
+                pairs = ",".join([*label_pairs, f'le="{bound}"'])
+                yield f"{self.name}_bucket{{{pairs}}} {cumulative}"
+            pairs = ",".join(label_pairs)
+            yield f"{self.name}_sum{{{pairs}}} {series[-2]}"
+            yield f"{self.name}_count{{{pairs}}} {series[-1]}"
+
+
+def escape_label(value: str) -> str:
+    """Экранировать значение метки."""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP запроса.",
+    ("method", "route", "status"),
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Суммарное время запросов к БД в рамках HTTP запроса.",
+    ("method", "route", "status"),
+)
+http_request_size = Histogram(
+    "http_request_size_bytes",
+    "Размер тела HTTP запроса по заголовку Content-Length.",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+http_response_size = Histogram(
+    "http_response_size_bytes",
+    "Размер тела HTTP ответа.",
+    ("method", "route", "status"),
+    buckets=SIZE_BUCKETS,
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "Время выполнения запроса к БД по нормализованному тексту запроса.",
+    ("statement",),
+)
+upstream_request_duration = Histogram(
+    "superhero_api_request_duration_seconds",
+    "Время запроса к SuperHero API.",
+    ("operation", "status"),
+)
+
+HISTOGRAMS: tuple[Histogram, ...] = (
+    http_request_duration,
+    http_request_db_duration,
+    http_request_size,
+    http_response_size,
+    db_statement_duration,
+    upstream_request_duration,
+)
+
+
+def render_metrics(gauges: dict[str, dict[str, Any]] | None = None) -> str:
+    """
+    Все метрики в текстовом формате Prometheus.
+
+    Args:
+        gauges (dict[str, dict[str, Any]] | None): дополнительные числовые
+            показатели, например `{"db_pool": EngineLocal.pool.stats()}`;
+            выводятся как `<префикс>_<ключ>`, нечисловые значения пропускаются.
+    """
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for prefix, values in (gauges or {}).items():
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# MARK: ASGI
+class MetricsMiddleware:
+    """
+    ASGI middleware: время обработки, время запросов к БД и размеры
+    тела запроса и ответа по шаблону маршрута и статусу ответа.
+
+    Шаблон маршрута (`/api/v1/heroes/{id}`) берется из `scope["route"]`
+    после маршрутизации, поэтому значения параметров пути не попадают в метки.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        db_time = [0.0]
+        token = request_db_time.set(db_time)
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_db_time.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            status = str(status_code)
+            http_request_duration.observe(
+                time.perf_counter() - started, method, route, status
+            )
+            http_request_db_duration.observe(db_time[0], method, route, status)
+            http_response_size.observe(response_size, method, route, status)
+            for name, value in scope["headers"]:
+                if name == b"content-length" and value.isdigit():
+                    http_request_size.observe(int(value), method, route)
+                    break
+
+
+# MARK: SQLAlchemy
+_PLACEHOLDERS_RE = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+_LITERALS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Нормализовать текст запроса для метки метрики.
+
+    Параметры и литералы заменяются на `?`, списки параметров
+    (`IN ($1, $2, ...)`) сворачиваются, пробелы схлопываются.
+    """
+
+    statement = _PLACEHOLDERS_RE.sub("?", statement)
+    statement = _LITERALS_RE.sub("?", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_statement_duration.observe(elapsed, normalize_statement(statement))
+    db_time = request_db_time.get()
+    if db_time is not None:
+        db_time[0] += elapsed
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Учитывать время выполнения запросов движка в `db_statement_duration`."""
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,55 @@
+"""Модуль курсорной (keyset) пагинации."""
+
+import base64
+import binascii
+import json
+from typing import Any, Sequence
+
+from src import exceptions
+
+__all__ = ["encode_cursor", "decode_cursor"]
+
+
+def encode_cursor(values: Sequence[Any], signature: str) -> str:
+    """
+    Закодировать значения ключей сортировки записи в непрозрачный курсор.
+
+    Args:
+        values(Sequence[Any]): значения ключей сортировки, включая `id`.
+        signature(str): подпись сортировки, см. `BaseDAO.sort_signature`.
+
+    Returns:
+        str: курсор в формате base64url без выравнивания.
+    """
+
+    raw = json.dumps({"s": signature, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, signature: str) -> list[Any]:
+    """
+    Раскодировать курсор, полученный из `encode_cursor`.
+
+    Курсор принимается только для той же сортировки, для которой он выдан.
+
+    Args:
+        cursor(str): курсор.
+        signature(str): подпись текущей сортировки.
+
+    Raises:
+        InvalidCursor: Некорректный курсор пагинации `HTTP_400_BAD_REQUEST`.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (binascii.Error, ValueError) as ex:
+        raise exceptions.InvalidCursor from ex
+    if (
+        not isinstance(data, dict)
+        or data.get("s") != signature
+        or not isinstance(data.get("v"), list)
+        or not data["v"]
+    ):
+        raise exceptions.InvalidCursor
+    return data["v"]
@@ -0,0 +1,142 @@
+"""Модуль пула соединений SQLAlchemy с метриками использования."""
+
+import bisect
+import time
+from typing import Any
+
+from sqlalchemy import AsyncAdaptedQueuePool, event, exc
+from sqlalchemy.pool import ConnectionPoolEntry
+
+__all__ = ["PoolMetrics", "InstrumentedAsyncQueuePool"]
+
+# Верхние границы интервалов гистограммы ожидания соединения, с
+CHECKOUT_WAIT_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class PoolMetrics:
+    """
+    Счетчики пула соединений.
+
+    Атрибуты класса:
+        checkouts (int): число выданных соединений.
+        checkout_timeouts (int): число ошибок ожидания свободного соединения.
+        checkout_wait_sum (float): суммарное время ожидания соединения, с.
+        checkout_wait_max (float): максимальное время ожидания соединения, с.
+        checkout_wait_buckets (list[int]): гистограмма времени ожидания
+            по `CHECKOUT_WAIT_BUCKETS`, последний интервал - больше 5 с.
+        checked_out_max (int): максимальное число одновременно выданных соединений.
+        overflow_max (int): максимальное число соединений сверх `pool_size`.
+        connects (int): число открытых соединений с Postgres.
+        closes (int): число закрытых соединений с Postgres.
+        invalidations (int): число соединений, признанных неработоспособными.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_sum = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_wait_buckets = [0] * (len(CHECKOUT_WAIT_BUCKETS) + 1)
+        self.checked_out_max = 0
+        self.overflow_max = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def observe_checkout(self, wait: float, checked_out: int, overflow: int) -> None:
+        """Учесть выдачу соединения после ожидания `wait` секунд."""
+
+        self.checkouts += 1
+        self.checkout_wait_sum += wait
+        self.checkout_wait_max = max(self.checkout_wait_max, wait)
+        self.checkout_wait_buckets[bisect.bisect_left(CHECKOUT_WAIT_BUCKETS, wait)] += 1
+        self.checked_out_max = max(self.checked_out_max, checked_out)
+        self.overflow_max = max(self.overflow_max, overflow)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений `AsyncAdaptedQueuePool`, собирающий `PoolMetrics`.
+
+    Время ожидания соединения измеряется вокруг получения соединения из очереди,
+    открытие, закрытие и инвалидация соединений учитываются событиями пула.
+    Метрики сохраняются при пересоздании пула (`engine.dispose()`).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # Пересозданный пул получает обработчики событий исходного пула
+        # через `_dispatch` вместе с его метриками, см. `recreate`
+        if "_dispatch" not in kwargs:
+            event.listen(self, "connect", self._on_connect)
+            event.listen(self, "close", self._on_close)
+            event.listen(self, "close_detached", self._on_close)
+            event.listen(self, "invalidate", self._on_invalidate)
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        self.metrics.observe_checkout(
+            wait=time.perf_counter() - started,
+            checked_out=self.checkedout(),
+            overflow=max(self.overflow(), 0),
+        )
+        return record
+
+    def _on_connect(self, *args: Any) -> None:
+        self.metrics.connects += 1
+
+    def _on_close(self, *args: Any) -> None:
+        self.metrics.closes += 1
+
+    def _on_invalidate(self, *args: Any) -> None:
+        self.metrics.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Текущее состояние пула и накопленные метрики."""
+
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checked_out_max": metrics.checked_out_max,
+            "overflow_max": metrics.overflow_max,
+            "checkouts": metrics.checkouts,
+            "checkout_timeouts": metrics.checkout_timeouts,
+            "checkout_wait_sum": metrics.checkout_wait_sum,
+            "checkout_wait_max": metrics.checkout_wait_max,
+            "checkout_wait_buckets": dict(
+                zip(
+                    (*map(str, CHECKOUT_WAIT_BUCKETS), "+Inf"),
+                    metrics.checkout_wait_buckets,
+                    strict=True,
+                )
+            ),
+            "connects": metrics.connects,
+            "closes": metrics.closes,
+            "invalidations": metrics.invalidations,
+        }
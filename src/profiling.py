@@ -0,0 +1,190 @@
+"""
+Модуль профилирования отдельных HTTP запросов по запросу клиента.
+
+Профилирование включается настройкой `PROFILING_ENABLED` и запрашивается
+заголовком `X-Profile: 1` или параметром `?profile=1`. Вне режимов LOCAL
+и TEST требуется токен администратора в заголовке `X-Admin-Token`.
+
+Во время обработки запроса отдельный поток с интервалом `PROFILING_INTERVAL`
+снимает стек потока event loop. Результат сохраняется в `PROFILING_DIR`
+в формате свернутых стеков (`flamegraph.pl`, speedscope). Идентификатор
+профиля передается в заголовке ответа `X-Profile-Id`, а сводка - в заголовке
+`Server-Timing` или, для потоковых ответов, в журнале.
+"""
+
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src import api_constants
+from src.config import api_settings
+from src.dependencies import is_admin_token
+from src.metrics import request_db_time
+
+__all__ = ["ProfilingMiddleware", "SamplingProfiler"]
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик одного потока.
+
+    Стеки снимаются из отдельного потока через `sys._current_frames()`,
+    поэтому профилируемый код не замедляется трассировкой вызовов.
+    В асинхронном приложении в выборку попадают и другие запросы,
+    обрабатываемые тем же event loop одновременно с профилируемым.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    @staticmethod
+    def format_stack(frame: FrameType | None) -> str:
+        """Стек в формате `module.function;...` от корня к текущей функции."""
+
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.format_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """Профиль в формате свернутых стеков: `стек число_выборок`."""
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware профилирования запроса по заголовку или параметру запроса.
+
+    Одновременно профилируется не больше одного запроса: остальные запросы
+    с флагом профилирования обрабатываются без профилировщика.
+    Ответ из одной части задерживается до завершения обработки, чтобы
+    добавить заголовок `Server-Timing`. Части потокового ответа передаются
+    клиенту без задержки, а сводка профиля записывается в журнал.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_requested(scope: Scope) -> bool:
+        """Проверить флаг профилирования и право на профилирование запроса."""
+
+        headers = Headers(scope=scope)
+        flag = headers.get(api_constants.PROFILING_HEADER) or QueryParams(
+            scope["query_string"]
+        ).get(api_constants.PROFILING_QUERY_PARAM)
+        if flag not in ("1", "true"):
+            return False
+        return api_settings.MODE in ("LOCAL", "TEST") or is_admin_token(
+            headers.get("x-admin-token")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.is_requested(scope)
+            or not self._lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._lock.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile_id = uuid.uuid4().hex
+        # Ответ из одной части: начало ответа и тело до завершения обработки
+        pending: list[Message] = []
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+                pending.append(message)
+                return
+            if not streaming and message["type"] == "http.response.body":
+                if not message.get("more_body", False) and len(pending) == 1:
+                    pending.append(message)
+                    return
+                streaming = True
+                for pending_message in pending:
+                    await send(pending_message)
+                pending.clear()
+            await send(message)
+
+        db_time = request_db_time.get()
+        token = None
+        if db_time is None:
+            db_time = [0.0]
+            token = request_db_time.set(db_time)
+        db_started = db_time[0]
+
+        profiler = SamplingProfiler(
+            thread_id=threading.get_ident(), interval=api_settings.PROFILING_INTERVAL
+        )
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            total = time.perf_counter() - started
+            cpu = time.thread_time() - cpu_started
+            db = db_time[0] - db_started
+            if token is not None:
+                request_db_time.reset(token)
+
+        directory = Path(api_settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{profile_id}.folded").write_text(profiler.folded())
+
+        timing = (
+            f"total;dur={total * 1000:.2f}, db;dur={db * 1000:.2f}, "
+            f"cpu;dur={cpu * 1000:.2f}"
+        )
+        if streaming:
+            logger.info("Профиль %s %s: %s", profile_id, scope["path"], timing)
+        for message in pending:
+            if message["type"] == "http.response.start":
+                message["headers"].append((b"server-timing", timing.encode()))
+            await send(message)
@@ -0,0 +1,247 @@
+"""Модуль маршрутизации запросов на чтение к репликам Postgres."""
+
+import asyncio
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Literal
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import api_constants
+from src.config import api_settings
+from src.database import SessionLocal, create_engine
+
+__all__ = ["Replica", "ReplicaSet", "read_replicas"]
+
+# Состояние репликации: режим восстановления, получение WAL с основной БД,
+# применение всех полученных WAL и время с последней примененной транзакции, с.
+# Статус `pg_stat_wal_receiver` виден суперпользователю и ролям
+# с `pg_read_all_stats` (`pg_monitor`), для остальных реплика недоступна.
+REPLICATION_STATE_SQL = text(
+    """
+    SELECT
+        pg_is_in_recovery(),
+        EXISTS (SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'),
+        pg_last_wal_receive_lsn() IS NOT DISTINCT FROM pg_last_wal_replay_lsn(),
+        extract(epoch FROM now() - pg_last_xact_replay_timestamp())::float
+    """
+)
+
+
+class Replica:
+    """
+    Реплика Postgres.
+
+    Атрибуты класса:
+        url (str): URL подключения.
+        engine (AsyncEngine): движок SQLAlchemy реплики.
+        sessionmaker (async_sessionmaker): фабрика сессий реплики.
+        in_flight (int): число открытых сессий.
+        lag (float | None): отставание при последней проверке, с;
+            `None` - реплика недоступна, не получает WAL с основной БД
+            или еще не проверялась.
+        checked_at (float): время последней проверки, `time.monotonic()`.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url=url)
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine,
+            autoflush=False,
+            expire_on_commit=False,
+            class_=AsyncSession,
+        )
+        self.in_flight = 0
+        self.lag: float | None = None
+        self.checked_at = -math.inf
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def replication_lag(
+        in_recovery: bool, streaming: bool, replayed: bool, replay_age: float | None
+    ) -> float | None:
+        """
+        Отставание реплики по состоянию репликации, с.
+
+        Если все полученные WAL уже применены, реплика не отстает, даже если
+        основная БД давно не получала изменений. Без потоковой репликации
+        отставание неизвестно и растет со временем, поэтому возвращается `None`.
+        """
+
+        if not in_recovery:
+            return 0.0
+        if not streaming:
+            return None
+        if replayed:
+            return 0.0
+        return replay_age or 0.0
+
+    async def measure_lag(self) -> float | None:
+        """
+        Получить отставание реплики от основной БД, с;
+        `None` - реплика не получает WAL с основной БД.
+        """
+
+        async with self.engine.connect() as conn:
+            state = (await conn.execute(REPLICATION_STATE_SQL)).one()
+        return self.replication_lag(*state)
+
+
+class ReplicaSet:
+    """
+    Набор реплик для запросов только на чтение.
+
+    Реплика выбирается по очереди (`round_robin`) или по наименьшему числу
+    открытых сессий (`least_conn`). Отставание реплики проверяется не чаще
+    раза в `check_interval` секунд; недоступные и отстающие больше `max_lag`
+    реплики пропускаются, а если подходящих реплик нет, сессия открывается
+    на основной БД.
+
+    После записи (`mark_write`) в течение `max_lag + check_interval` секунд
+    сессии открываются на основной БД: за это время реплики, отстающие
+    не больше `max_lag`, применяют запись. Время записи хранится в памяти
+    процесса: запись в одном процессе (воркере) не переключает чтение
+    в других процессах, их чтение с реплики может не включать запись
+    до `max_lag` секунд.
+
+    Атрибуты класса:
+        primary_fallbacks (int): число сессий на основной БД
+            из-за отсутствия доступных реплик.
+        primary_after_write (int): число сессий на основной БД
+            в окне после записи.
+        last_write_at (float): время последней записи, `time.monotonic()`.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        primary: async_sessionmaker[AsyncSession],
+        selection: Literal["round_robin", "least_conn"] = "round_robin",
+        max_lag: float = 5.0,
+        check_interval: float = 1.0,
+    ):
+        self.replicas = [Replica(url=url) for url in urls]
+        self.primary = primary
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.primary_fallbacks = 0
+        self.primary_after_write = 0
+        self.last_write_at = -math.inf
+        self._counter = itertools.count()
+
+    def mark_write(self) -> None:
+        """
+        Отметить запись в основную БД, которую реплики могли еще не получить.
+        Действует только на чтение в текущем процессе.
+        """
+
+        self.last_write_at = time.monotonic()
+
+    def is_fresh(self, session: AsyncSession) -> bool:
+        """
+        Проверить, что данные сессии включают последнюю запись `mark_write`:
+        сессия открыта на основной БД или на реплике после записи.
+        Данные реплики, прочитанные без этой гарантии, не следует кешировать.
+        """
+
+        opened_at = session.info.get("replica_opened_at")
+        return opened_at is None or opened_at > self.last_write_at
+
+    async def _is_available(self, replica: Replica) -> bool:
+        """Проверить, что реплика доступна и отстает не больше `max_lag`."""
+
+        if time.monotonic() - replica.checked_at >= self.check_interval:
+            async with replica._lock:
+                # Пока ожидали блокировку, реплику мог проверить другой запрос
+                if time.monotonic() - replica.checked_at >= self.check_interval:
+                    try:
+                        replica.lag = await asyncio.wait_for(
+                            replica.measure_lag(),
+                            timeout=api_constants.DB_REPLICA_CHECK_TIMEOUT,
+                        )
+                    except (OSError, TimeoutError, exc.SQLAlchemyError):
+                        replica.lag = None
+                    replica.checked_at = time.monotonic()
+        return replica.lag is not None and replica.lag <= self.max_lag
+
+    async def select(self) -> Replica | None:
+        """Выбрать реплику или `None`, если подходящих реплик нет."""
+
+        if not self.replicas:
+            return None
+        if self.selection == "least_conn":
+            candidates = sorted(self.replicas, key=lambda replica: replica.in_flight)
+        else:
+            start = next(self._counter) % len(self.replicas)
+            candidates = self.replicas[start:] + self.replicas[:start]
+
+        for replica in candidates:
+            if await self._is_available(replica):
+                return replica
+        return None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """Открыть сессию на выбранной реплике или на основной БД."""
+
+        replica = None
+        write_window = self.max_lag + self.check_interval
+        if time.monotonic() - self.last_write_at < write_window:
+            if self.replicas:
+                self.primary_after_write += 1
+        else:
+            replica = await self.select()
+            if replica is None and self.replicas:
+                self.primary_fallbacks += 1
+        if replica is None:
+            async with self.primary() as session:
+                yield session
+            return
+
+        replica.in_flight += 1
+        try:
+            async with replica.sessionmaker() as session:
+                session.info["replica_opened_at"] = time.monotonic()
+                yield session
+        finally:
+            replica.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """Состояние реплик и число обращений к основной БД вместо реплик."""
+
+        return {
+            "selection": self.selection,
+            "primary_fallbacks": self.primary_fallbacks,
+            "primary_after_write": self.primary_after_write,
+            "replicas": [
+                {
+                    "host": replica.engine.url.host,
+                    "port": replica.engine.url.port,
+                    "in_flight": replica.in_flight,
+                    "lag": replica.lag,
+                    "available": replica.lag is not None
+                    and replica.lag <= self.max_lag,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def dispose(self) -> None:
+        """Закрыть соединения с репликами."""
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_replicas = ReplicaSet(
+    urls=api_settings.REPLICA_DATABASE_URLS,
+    primary=SessionLocal,
+    selection=api_settings.DB_REPLICA_SELECTION,
+    max_lag=api_settings.DB_REPLICA_MAX_LAG,
+    check_interval=api_settings.DB_REPLICA_CHECK_INTERVAL,
+)
@@ -0,0 +1,58 @@
+"""Модуль объединения одновременных одинаковых операций (single-flight)."""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+__all__ = ["SingleFlight"]
+
+ResultType = TypeVar("ResultType")
+
+
+class SingleFlight(Generic[ResultType]):
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в рамках event loop процесса.
+
+    Первый вызов (лидер) выполняет операцию, остальные ожидают и получают
+    его результат или исключение. Если лидер был отменен, операцию
+    выполняет один из ожидающих вызовов.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, asyncio.Future[ResultType]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[ResultType]]
+    ) -> ResultType:
+        """
+        Выполнить операцию `fn` или дождаться результата уже выполняемой
+        операции с тем же ключом.
+        """
+
+        while (future := self._flights.get(key)) is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменен сам ожидающий вызов, а не лидер
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # Исключение лидера считается полученным, даже если ожидающих нет
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as ex:
+            future.set_exception(ex)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
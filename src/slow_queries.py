@@ -0,0 +1,268 @@
+"""
+Модуль журнала медленных запросов к БД.
+
+Запросы, выполняющиеся дольше порога, записываются в журнал с длительностью
+и формой параметров (типы без значений). Для части медленных запросов
+`SELECT` в отдельном соединении выполняется `EXPLAIN`, а если запрос вызывает
+только функции из `SLOW_QUERY_ANALYZE_FUNCTIONS` - `EXPLAIN (ANALYZE, BUFFERS)`.
+Число записей и `EXPLAIN` ограничено, чтобы при массовой деградации
+журнал сам не стал источником нагрузки.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src import api_constants
+from src.config import api_settings
+
+__all__ = [
+    "RateLimiter",
+    "SlowQueryLog",
+    "explain_options",
+    "parameters_shape",
+    "slow_query_log",
+]
+
+logger = logging.getLogger(__name__)
+
+_CALL_RE = re.compile(r"([A-Za-z_][\w.]*)\s*\(")
+# Ключевые слова SQL, за которыми следует скобка, но не вызов функции
+_SQL_KEYWORDS: frozenset[str] = frozenset(
+    {
+        "and",
+        "any",
+        "as",
+        "by",
+        "cast",
+        "else",
+        "exists",
+        "filter",
+        "from",
+        "group",
+        "in",
+        "join",
+        "lateral",
+        "not",
+        "on",
+        "or",
+        "over",
+        "select",
+        "sets",
+        "then",
+        "values",
+        "when",
+        "where",
+    }
+)
+
+
+class RateLimiter:
+    """Ограничение числа событий: не больше `limit` за `period` секунд."""
+
+    def __init__(self, limit: int, period: float = 60.0):
+        self.limit = limit
+        self.period = period
+        self.suppressed = 0
+        self._window_start = -period
+        self._count = 0
+
+    def acquire(self) -> bool:
+        """Учесть событие, если лимит текущего окна не исчерпан."""
+
+        now = time.monotonic()
+        if now - self._window_start >= self.period:
+            self._window_start = now
+            self._count = 0
+        if self._count >= self.limit:
+            self.suppressed += 1
+            return False
+        self._count += 1
+        return True
+
+
+def parameters_shape(parameters: Any) -> str:
+    """Форма параметров запроса: типы значений без самих значений."""
+
+    def shape(value: Any) -> str:
+        if isinstance(value, (list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {shape(v)}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(map(shape, parameters)) + ")"
+    return shape(parameters)
+
+
+def explain_options(statement: str) -> str | None:
+    """
+    Параметры `EXPLAIN` для медленного запроса.
+
+    `EXPLAIN ANALYZE` выполняет запрос повторно, поэтому используется только
+    для `SELECT`, вызывающих функции из `SLOW_QUERY_ANALYZE_FUNCTIONS`.
+    Для остальных `SELECT` план строится без выполнения запроса.
+
+    Returns:
+        str | None: параметры `EXPLAIN` или `None`, если план не строится:
+            запрос не `SELECT` или использует advisory-блокировки.
+    """
+
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    functions = {
+        name.rsplit(".", 1)[-1].lower() for name in _CALL_RE.findall(statement)
+    }
+    if any(name.startswith("pg_advisory") for name in functions):
+        return None
+    if functions - _SQL_KEYWORDS <= api_constants.SLOW_QUERY_ANALYZE_FUNCTIONS:
+        return "(ANALYZE, BUFFERS) "
+    return ""
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов движков SQLAlchemy.
+
+    Args:
+        threshold (float): порог длительности запроса, с.
+        log_per_minute (int): максимальное число записей в минуту.
+        explain_sample_rate (float): доля медленных `SELECT`, для которых
+            выполняется `EXPLAIN`.
+        explain_per_minute (int): максимальное число `EXPLAIN` в минуту.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        log_per_minute: int,
+        explain_sample_rate: float,
+        explain_per_minute: int,
+    ):
+        self.threshold = threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.log_limiter = RateLimiter(limit=log_per_minute)
+        self.explain_limiter = RateLimiter(limit=explain_per_minute)
+        self._tasks: set[asyncio.Task] = set()
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        """Отслеживать запросы движка."""
+
+        def before_cursor_execute(
+            conn: Connection,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: ExecutionContext | None,
+            executemany: bool,
+        ) -> None:
+            # Запросы самого журнала (`EXPLAIN`) не отслеживаются
+            if context is not None and context.execution_options.get(
+                "slow_query_log", True
+            ):
+                context._slow_query_started = time.perf_counter()
+
+        def after_cursor_execute(
+            conn: Connection,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: ExecutionContext | None,
+            executemany: bool,
+        ) -> None:
+            started = getattr(context, "_slow_query_started", None)
+            if started is None:
+                return
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.observe(engine, statement, parameters, elapsed, executemany)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def observe(
+        self,
+        engine: AsyncEngine,
+        statement: str,
+        parameters: Any,
+        elapsed: float,
+        executemany: bool = False,
+    ) -> None:
+        """Записать медленный запрос и, при выборке, запланировать `EXPLAIN`."""
+
+        if not self.log_limiter.acquire():
+            return
+        suppressed, self.log_limiter.suppressed = self.log_limiter.suppressed, 0
+        logger.warning(
+            "Медленный запрос %.3f с (пропущено записей: %d): %s; параметры: %s",
+            elapsed,
+            suppressed,
+            statement,
+            parameters_shape(parameters),
+        )
+
+        options = None if executemany else explain_options(statement)
+        if (
+            options is None
+            or random.random() >= self.explain_sample_rate
+            or not self.explain_limiter.acquire()
+        ):
+            return
+        task = asyncio.get_running_loop().create_task(
+            self.explain(engine, statement, parameters, options)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def explain(
+        self, engine: AsyncEngine, statement: str, parameters: Any, options: str
+    ) -> str | None:
+        """
+        Выполнить `EXPLAIN` запроса с параметрами `options`
+        (см. `explain_options`) и записать план в журнал.
+
+        Запрос выполняется в отдельной транзакции только для чтения
+        с ограничением времени и откатывается. Данные, не зафиксированные
+        в транзакции исходного запроса, в этой транзакции не видны.
+        """
+
+        try:
+            async with engine.connect() as conn:
+                await conn.execution_options(slow_query_log=False)
+                await conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                await conn.exec_driver_sql(
+                    "SET LOCAL statement_timeout = "
+                    f"{int(api_constants.SLOW_QUERY_EXPLAIN_TIMEOUT * 1000)}"
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN {options}{statement}", parameters
+                )
+                plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except (OSError, exc.SQLAlchemyError) as ex:
+            logger.warning("Не удалось получить план медленного запроса: %s", ex)
+            return None
+        logger.warning("План медленного запроса: %s\n%s", statement, plan)
+        return plan
+
+    async def wait(self) -> None:
+        """Дождаться выполнения запланированных `EXPLAIN`."""
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+slow_query_log = SlowQueryLog(
+    threshold=api_settings.DB_SLOW_QUERY_THRESHOLD or 0.0,
+    log_per_minute=api_settings.DB_SLOW_QUERY_LOG_PER_MINUTE,
+    explain_sample_rate=api_settings.DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_per_minute=api_settings.DB_SLOW_QUERY_EXPLAIN_PER_MINUTE,
+)
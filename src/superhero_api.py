@@ -0,0 +1,114 @@
+"""Модуль HTTP клиента сервиса [SuperHero API](https://superheroapi.com/)."""
+
+import asyncio
+import time
+from typing import Any
+
+import aiohttp
+from fastapi import status
+
+from src import exceptions
+from src.config import api_settings
+from src.metrics import upstream_request_duration
+
+__all__ = ["SuperHeroAPIClient", "superhero_client"]
+
+
+class SuperHeroAPIClient:
+    """
+    Клиент сервиса SuperHero API с общим пулом соединений.
+
+    Сессия создается один раз на время жизни приложения, что позволяет
+    переиспользовать keep-alive соединения, кеш DNS и TLS сессии.
+    Число одновременных запросов к сервису ограничено семафором.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        limit: int,
+        limit_per_host: int,
+        connect_timeout: float,
+        read_timeout: float,
+        dns_cache_ttl: int,
+        keepalive_timeout: float,
+        max_in_flight: int,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        """Создать сессию и пул соединений."""
+
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=self.timeout, raise_for_status=False
+        )
+
+    async def close(self) -> None:
+        """Закрыть сессию и все соединения пула."""
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def search(self, name: str) -> dict[str, Any]:
+        """
+        Выполнить поиск героев по имени.
+
+        Сессия создается при первом обращении, если клиент не был
+        запущен при старте приложения.
+
+        Raises:
+            SuperHeroAPINotAvailable: Сервис SuperHeroAPI не доступен `HTTP_503_SERVICE_UNAVAILABLE`.
+        """
+
+        await self.start()
+        async with self.semaphore:
+            started = time.perf_counter()
+            response_status = "error"
+            try:
+                async with self._session.get(
+                    url=f"{self.base_url}/{self.token}/search/{name}"
+                ) as response:
+                    response_status = str(response.status)
+                    if response.status != status.HTTP_200_OK:
+                        raise exceptions.SuperHeroAPINotAvailable
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                response_status = "error"
+                raise exceptions.SuperHeroAPINotAvailable from ex
+            finally:
+                upstream_request_duration.observe(
+                    time.perf_counter() - started, "search", response_status
+                )
+
+
+superhero_client = SuperHeroAPIClient(
+    base_url=api_settings.SUPERHERO_API_URL,
+    token=api_settings.SUPERHERO_API_TOKEN,
+    limit=api_settings.SUPERHERO_API_LIMIT,
+    limit_per_host=api_settings.SUPERHERO_API_LIMIT_PER_HOST,
+    connect_timeout=api_settings.SUPERHERO_API_CONNECT_TIMEOUT,
+    read_timeout=api_settings.SUPERHERO_API_READ_TIMEOUT,
+    dns_cache_ttl=api_settings.SUPERHERO_API_DNS_CACHE_TTL,
+    keepalive_timeout=api_settings.SUPERHERO_API_KEEPALIVE_TIMEOUT,
+    max_in_flight=api_settings.SUPERHERO_API_MAX_IN_FLIGHT,
+)
@@ -0,0 +1,24 @@
+import argparse
+
+import pytest
+
+from src.cli import import_heroes
+
+
+class TestCLI:
+    """Класс для тестирования консольных команд."""
+
+    async def test_import_heroes_invalid_data(self, tmp_path):
+        """Ошибка разбора файла выводится без трассировки с ненулевым кодом."""
+
+        path = tmp_path / "heroes.json"
+        path.write_text('[{"id": 1,, "name": "Batman"}]')
+        args = argparse.Namespace(
+            path=path, format=None, on_conflict="ignore", batch_size=10
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            await import_heroes(args)
+        assert str(exc_info.value).startswith(
+            "Ошибка загрузки героев: Некорректный JSON"
+        )
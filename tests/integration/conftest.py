@@ -1,10 +1,23 @@
+import json
+from collections import Counter
+from pathlib import Path
 from typing import AsyncGenerator
 
 import httpx
 import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from fastapi import APIRouter, FastAPI
 
-from src.dependencies import get_session
+from src.config import api_settings
+from src.dependencies import get_read_session, get_session
+from src.heroes.service import heroes_cache, upstream_cache
+from src.superhero_api import SuperHeroAPIClient
+
+HEROES_FIXTURE_PATH = Path(__file__).parents[2] / "alembic" / "fixtures" / "heroes.json"
+# В контейнере тестов используется `postgres-replica-test`,
+# локально роль реплик выполняет основная БД
+REPLICA_URL = next(iter(api_settings.REPLICA_DATABASE_URLS), api_settings.DATABASE_URL)
 
 
 class BaseTestRouter:
@@ -21,12 +34,81 @@ class BaseTestRouter:
         напрямую в API с использованием протокола ASGI.
         """
 
+        # Кешированные ответы не должны переживать транзакцию теста
+        heroes_cache.invalidate()
+
         app = FastAPI()
         app.include_router(self.router)
         app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_read_session] = lambda: session
 
         transport = httpx.ASGITransport(app=app)
         async with httpx.AsyncClient(
             transport=transport, base_url="http://test"
         ) as async_client:
             yield async_client
+
+
+# MARK: SuperHeroAPI
+def load_upstream_heroes() -> list[dict]:
+    """Загрузить героев из фикстуры в формате ответа SuperHero API."""
+
+    with open(HEROES_FIXTURE_PATH, encoding="utf-8") as json_data:
+        heroes = json.load(json_data)["heroes"]
+    return [
+        {
+            key: str(value)
+            if key == "id"
+            else json.loads(value)
+            if key != "name"
+            else value
+            for key, value in hero.items()
+        }
+        for hero in heroes
+    ]
+
+
+@pytest_asyncio.fixture(scope="function")
+async def superhero_api_stub(mocker) -> AsyncGenerator[Counter, None]:
+    """
+    Локальный stub сервиса SuperHero API.
+
+    Поиск выполняется по вхождению имени в героев из фикстуры
+    `alembic/fixtures/heroes.json`. Клиент сервиса подменяется клиентом,
+    направленным на stub. Возвращается счетчик запросов к stub.
+    """
+
+    heroes = load_upstream_heroes()
+    requests = Counter()
+    upstream_cache.invalidate()
+
+    async def search(request: web.Request) -> web.Response:
+        requests["search"] += 1
+        name = request.match_info["name"].lower()
+        results = [hero for hero in heroes if name in hero["name"].lower()]
+        if not results:
+            return web.json_response(
+                {"response": "error", "error": "character with given name not found"}
+            )
+        return web.json_response(
+            {"response": "success", "results-for": name, "results": results}
+        )
+
+    app = web.Application()
+    app.router.add_get("/api/{token}/search/{name}", search)
+
+    async with TestServer(app) as server:
+        client = SuperHeroAPIClient(
+            base_url=str(server.make_url("/api")),
+            token="token",
+            limit=10,
+            limit_per_host=10,
+            connect_timeout=1,
+            read_timeout=1,
+            dns_cache_ttl=10,
+            keepalive_timeout=10,
+            max_in_flight=10,
+        )
+        mocker.patch("src.heroes.service.superhero_client", client)
+        yield requests
+        await client.close()
@@ -1,15 +1,42 @@
 import copy
+import csv
+import io
+import json
+import statistics
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 import httpx
-from fastapi import status
-from sqlalchemy import delete
+import pytest
+from fastapi import FastAPI, status
+from sqlalchemy import delete, event, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src import api_constants, pagination
+from src.config import api_settings
+from src.dao import Explain
+from src.database import EngineLocal
+from src.dependencies import get_read_session, get_session
 from src.heroes.dao import HeroDAO
 from src.heroes.models import HeroModel
 from src.heroes.router import heroes_router
-from src.heroes.schemas import HeroListReadSchema, HeroQuerySchema
-from tests.integration.conftest import BaseTestRouter
+from src.heroes.schemas import (
+    HERO_NESTED_KEYS,
+    HeroAggregatesReadSchema,
+    HeroBatchReadSchema,
+    HeroImportReadSchema,
+    HeroListReadSchema,
+    HeroPowerStatsSchema,
+    HeroQuerySchema,
+    HeroReadSchema,
+)
+from src.heroes.service import HeroesService, heroes_cache
+from src.replicas import ReplicaSet
+from tests.integration.conftest import (
+    HEROES_FIXTURE_PATH,
+    REPLICA_URL,
+    BaseTestRouter,
+)
 
 
 class TestHeroesRouter(BaseTestRouter):
@@ -61,6 +88,524 @@ class TestHeroesRouter(BaseTestRouter):
         assert heroes_data.heroes[0].id == 69
         assert heroes_data.heroes[1].id == 70
 
+    async def test_get_heroes_powerstats_query(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно отфильтровать героев по диапазону характеристик."""
+
+        response = await router_client.get(
+            url="/heroes",
+            params=HeroQuerySchema(strength_min=50, combat_max=80).model_dump(
+                exclude_unset=True
+            ),
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.count == await HeroDAO.count(
+            HeroModel.strength >= 50, HeroModel.combat <= 80, session=session
+        )
+
+        # Формат `powerstats` в ответе не изменился
+        for hero in heroes_data.heroes:
+            assert int(hero.powerstats.strength) >= 50
+            assert int(hero.powerstats.combat) <= 80
+
+    async def test_get_heroes_cursor_pagination(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно получить всех героев постранично по курсору."""
+
+        response = await router_client.get(url="/heroes")
+        all_ids = [hero.id for hero in HeroListReadSchema(**response.json()).heroes]
+
+        ids, params, pages = [], {"limit": 5}, []
+        while True:
+            response = await router_client.get(url="/heroes", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            heroes_data = HeroListReadSchema(**response.json())
+            assert heroes_data.count == len(all_ids)
+            ids.extend(hero.id for hero in heroes_data.heroes)
+            pages.append(heroes_data)
+            if heroes_data.next_cursor is None:
+                break
+            params = {"limit": 5, "after": heroes_data.next_cursor}
+
+        # Курсорный режим возвращает те же записи, что и режим смещения
+        assert ids == all_ids
+
+        # По курсору `before` возвращается предыдущая страница
+        response = await router_client.get(
+            url="/heroes", params={"limit": 5, "before": pages[1].prev_cursor}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.heroes == pages[0].heroes
+        assert heroes_data.prev_cursor is None
+
+    async def test_get_heroes_sort(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно отсортировать героев по нескольким полям и пройти по курсору."""
+
+        heroes = (await session.scalars(select(HeroModel))).all()
+        # Герои без значения характеристики выводятся в конце рейтинга
+        expected = [
+            hero.id
+            for hero in sorted(
+                heroes,
+                key=lambda hero: (
+                    -(hero.strength if hero.strength is not None else -1),
+                    hero.name,
+                    hero.id,
+                ),
+            )
+        ]
+
+        ids, pages, params = [], [], {"limit": 4, "sort": "strength:desc, name"}
+        while True:
+            response = await router_client.get(url="/heroes", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            heroes_data = HeroListReadSchema(**response.json())
+            ids.extend(hero.id for hero in heroes_data.heroes)
+            pages.append(heroes_data)
+            if heroes_data.next_cursor is None:
+                break
+            params = {**params, "after": heroes_data.next_cursor}
+        assert ids == expected
+
+        # По курсору `before` возвращается предыдущая страница
+        response = await router_client.get(
+            url="/heroes",
+            params={
+                "limit": 4,
+                "sort": params["sort"],
+                "before": pages[-1].prev_cursor,
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert HeroListReadSchema(**response.json()).heroes == pages[-2].heroes
+
+        for sort in ("biography:asc", "strength:up", "name,name:desc"):
+            response = await router_client.get(url="/heroes", params={"sort": sort})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_get_heroes_invalid_cursor(self, router_client: httpx.AsyncClient):
+        """Некорректный курсор отклоняется."""
+
+        response = await router_client.get(url="/heroes", params={"after": "@@@"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Курсор другой сортировки
+        response = await router_client.get(
+            url="/heroes", params={"sort": "name", "limit": 1}
+        )
+        next_cursor = HeroListReadSchema(**response.json()).next_cursor
+        response = await router_client.get(
+            url="/heroes", params={"sort": "strength", "after": next_cursor}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Значения курсора не соответствуют типам ключей сортировки
+        signature = HeroDAO.sort_signature(HeroModel.name.asc())
+        for values in (["abc", "1"], [1, 1], ["abc", True]):
+            response = await router_client.get(
+                url="/heroes",
+                params={
+                    "sort": "name",
+                    "after": pagination.encode_cursor(values, signature),
+                },
+            )
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_get_heroes_single_statement(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Страница героев и их общее число получаются одним запросом к БД."""
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            # Точки сохранения создаются фикстурой сессии
+            if not statement.startswith("SAVEPOINT"):
+                statements.append(statement)
+
+        event.listen(
+            EngineLocal.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+        try:
+            response = await router_client.get(url="/heroes", params={"limit": 5})
+        finally:
+            event.remove(
+                EngineLocal.sync_engine, "before_cursor_execute", before_cursor_execute
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(statements) == 1
+
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.count == await HeroDAO.count(session=session)
+        assert len(heroes_data.heroes) == 5
+
+    async def test_get_heroes_estimated_count(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно получить героев с оценкой общего числа записей."""
+
+        response = await router_client.get(
+            url="/heroes", params={"include_count": False, "strength_min": 50}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.count_estimated
+        # Для небольших выборок оценка уточняется точным подсчетом
+        assert heroes_data.count == await HeroDAO.count(
+            HeroModel.strength >= 50, session=session
+        )
+
+        # Отсутствие героев по-прежнему приводит к 404
+        response = await router_client.get(
+            url="/heroes", params={"include_count": False, "name": "Nobody"}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_get_heroes_estimated_count_lower_bound(
+        self, router_client: httpx.AsyncClient, mocker
+    ):
+        """Заниженная оценка заменяется числом уже просмотренных героев."""
+
+        mocker.patch.object(HeroDAO, "estimate_count", return_value=1)
+        response = await router_client.get(
+            url="/heroes", params={"include_count": False, "offset": 2, "limit": 5}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        heroes_data = HeroListReadSchema(**response.json())
+        assert len(heroes_data.heroes) == 5
+        # Дополнительная запись для проверки следующей страницы не учитывается
+        assert heroes_data.count == 7
+
+    async def test_get_heroes_containment_filters(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно отфильтровать героев по значениям JSONB полей."""
+
+        response = await router_client.get(
+            url="/heroes",
+            params={"publisher": "DC Comics", "alignment": "bad", "race": "Human"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        heroes_data = HeroListReadSchema(**response.json())
+        assert [hero.name for hero in heroes_data.heroes] == ["Bane", "Joker"]
+
+    async def test_containment_filters_use_gin_index(self, session: AsyncSession):
+        """Фильтры по JSONB полям обслуживаются GIN индексами."""
+
+        # В тестовой БД мало записей, поэтому последовательное сканирование
+        # отключается, чтобы проверить возможность использования индексов
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        for field, query in (
+            ("biography", HeroQuerySchema(publisher="DC Comics", alignment="bad")),
+            ("appearance", HeroQuerySchema(gender="Male", race="Human")),
+            ("connections", HeroQuerySchema(group_affiliation="Evil Deadpool Corps")),
+        ):
+            filters = HeroDAO.prepare_filters_by_query(query)
+            assert len(filters) == 1
+            plan = json.dumps(
+                await session.scalar(Explain(select(HeroModel.id).where(*filters)))
+            )
+            assert f"heroes_{field}_idx" in plan
+
+    async def test_get_heroes_name_contains(self, router_client: httpx.AsyncClient):
+        """Возможно найти героев по подстроке имени без учета регистра."""
+
+        response = await router_client.get(
+            url="/heroes", params={"name_contains": "bat"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.heroes
+        assert all("bat" in hero.name.lower() for hero in heroes_data.heroes)
+
+        # Символы шаблона `LIKE` экранируются
+        response = await router_client.get(url="/heroes", params={"name_contains": "%"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_get_heroes_fuzzy_search(self, router_client: httpx.AsyncClient):
+        """Возможно выполнить нечеткий поиск героев с ранжированием по сходству."""
+
+        response = await router_client.get(url="/heroes", params={"q": "batmn"})
+        assert response.status_code == status.HTTP_200_OK
+        heroes_data = HeroListReadSchema(**response.json())
+        # Слово `Batman` одинаково похоже на запрос для всех трех героев,
+        # при равном сходстве порядок определяется `id`
+        assert [hero.id for hero in heroes_data.heroes[:3]] == [69, 70, 71]
+
+        # Поиск выполняется и по полному имени героя
+        response = await router_client.get(url="/heroes", params={"q": "Bruce Wayne"})
+        assert response.status_code == status.HTTP_200_OK
+        heroes_data = HeroListReadSchema(**response.json())
+        assert heroes_data.heroes[0].biography.full_name == "Bruce Wayne"
+
+    async def test_get_heroes_fields(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно получить только выбранные поля героев."""
+
+        response = await router_client.get(
+            url="/heroes",
+            params={"name": "Batman", "fields": "image.url, name,powerstats"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        heroes = response.json()["heroes"]
+        assert [hero["id"] for hero in heroes] == [69, 70]
+        for hero in heroes:
+            assert set(hero) == {"id", "name", "powerstats", "image"}
+            assert set(hero["image"]) == {"url"}
+
+        response = await router_client.get(
+            url="/heroes", params={"fields": "biography.publisher,secret"}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        heroes_data = await HeroesService.get_heroes(
+            query=HeroQuerySchema(name="Batman", fields="biography.publisher"),
+            session=session,
+        )
+        assert heroes_data.heroes[0].biography.publisher == "DC Comics"
+
+    async def test_get_heroes_response_shape(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """
+        Вложенные поля героя содержат только ключи схемы в порядке схемы.
+        Значения, в том числе `image.url`, возвращаются в том виде,
+        в котором хранятся в БД.
+        """
+
+        await session.execute(
+            text(
+                "UPDATE heroes SET biography = biography || '{\"secret\": 1}', "
+                'image = \'{"url": "https://example.com", "secret": 1}\' '
+                "WHERE id = 69"
+            )
+        )
+
+        for url, params in (
+            ("/heroes", {"name": "Batman"}),
+            ("/heroes/batch", {"ids": [69]}),
+        ):
+            response = await router_client.get(url=url, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            hero = next(hero for hero in response.json()["heroes"] if hero["id"] == 69)
+            assert list(hero) == list(HeroReadSchema.model_fields)
+            for name, keys in HERO_NESTED_KEYS.items():
+                assert list(hero[name]) == list(keys)
+            assert hero["image"] == {"url": "https://example.com"}
+
+    async def test_get_heroes_cached(
+        self, session: AsyncSession, router_client: httpx.AsyncClient, mocker
+    ):
+        """Повторный запрос списка героев возвращается из кеша."""
+
+        find_json_sorted = mocker.spy(HeroDAO, "find_json_sorted")
+        hits = heroes_cache.hits
+
+        first = await router_client.get(url="/heroes", params={"name": "Batman"})
+        second = await router_client.get(url="/heroes", params={"name": "Batman"})
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.content == second.content
+        assert find_json_sorted.call_count == 1
+        assert heroes_cache.hits == hits + 1
+
+    async def test_get_heroes_after_write_not_cached_from_replica(
+        self, session: AsyncSession, mocker
+    ):
+        """После записи ответ не кешируется с данными отстающей реплики."""
+
+        @asynccontextmanager
+        async def primary() -> AsyncIterator[AsyncSession]:
+            yield session
+
+        # Реплика использует отдельное соединение и не видит данные транзакции
+        # теста, то есть отстает от основной БД на все записи теста
+        replicas = ReplicaSet(urls=[REPLICA_URL], primary=primary, max_lag=5.0)
+        mocker.patch.object(replicas.replicas[0], "measure_lag", return_value=3.0)
+        mocker.patch("src.heroes.service.read_replicas", replicas)
+
+        async def replica_session() -> AsyncIterator[AsyncSession]:
+            async with replicas.session() as read_session:
+                yield read_session
+
+        app = FastAPI()
+        app.include_router(self.router)
+        app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_read_session] = replica_session
+        hero = HeroReadSchema.model_validate(
+            await session.get(HeroModel, 69)
+        ).model_dump(mode="json", by_alias=True)
+        hero.update(id=100_000, name="Batman")
+
+        stale_count = await HeroDAO.count(HeroModel.name == "Batman", session=session)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                response = await client.post(
+                    url="/heroes/import",
+                    params={"format": "ndjson"},
+                    content=json.dumps(hero),
+                    headers={"X-Admin-Token": api_settings.ADMIN_TOKEN},
+                )
+                assert response.status_code == status.HTTP_200_OK
+
+                # Сразу после записи чтение выполняется на основной БД
+                params = {"name": "Batman"}
+                response = await client.get(url="/heroes", params=params)
+                assert HeroListReadSchema(**response.json()).count == stale_count + 1
+
+                # После окна записи ответ берется из кеша, а не с реплики
+                replicas.last_write_at -= replicas.max_lag + replicas.check_interval
+                response = await client.get(url="/heroes", params=params)
+                assert HeroListReadSchema(**response.json()).count == stale_count + 1
+
+                # Страница реплики, открытой до записи, не кешируется
+                async with replicas.session() as read_session:
+                    assert read_session.bind is replicas.replicas[0].engine
+                    replicas.mark_write()
+                    heroes_cache.invalidate()
+                    query = HeroQuerySchema(name="Batman")
+                    content = await HeroesService.get_heroes_json(
+                        query=query, session=read_session
+                    )
+                    heroes_data = HeroListReadSchema.model_validate_json(content)
+                    assert heroes_data.count == stale_count
+                assert len(heroes_cache) == 0
+        finally:
+            await replicas.dispose()
+
+    # MARK: Batch
+    async def test_get_heroes_batch(self, router_client: httpx.AsyncClient):
+        """Возможно получить героев по списку id в порядке запроса."""
+
+        response = await router_client.get(
+            url="/heroes/batch", params={"ids": [370, 69, 999999, 70, 69]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        batch = HeroBatchReadSchema(**response.json())
+        assert [hero.id for hero in batch.heroes] == [370, 69, 70]
+        assert batch.missing == [999999]
+
+        response = await router_client.get(
+            url="/heroes/batch", params={"ids": list(range(1000, 1102))}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        for ids in ([2**31], [69, 0]):
+            response = await router_client.get(url="/heroes/batch", params={"ids": ids})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    # MARK: Aggregates
+    async def test_get_aggregates(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно получить агрегаты героев, соответствующих фильтрам."""
+
+        response = await router_client.get(
+            url="/heroes/aggregates",
+            params={"publisher": "Marvel Comics", "bucket_size": 25},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        aggregates = HeroAggregatesReadSchema(**response.json())
+
+        heroes = (
+            await session.scalars(
+                select(HeroModel).where(
+                    HeroModel.biography["publisher"].astext == "Marvel Comics"
+                )
+            )
+        ).all()
+        assert aggregates.count == len(heroes)
+        assert [bucket.value for bucket in aggregates.facets["publisher"]] == [
+            "Marvel Comics"
+        ]
+        assert sum(bucket.count for bucket in aggregates.facets["gender"]) == len(
+            heroes
+        )
+
+        strength = [hero.strength for hero in heroes if hero.strength is not None]
+        summary = aggregates.powerstats["strength"]
+        assert summary.count == len(strength)
+        assert (summary.min, summary.max) == (min(strength), max(strength))
+        assert summary.avg == pytest.approx(sum(strength) / len(strength))
+        assert summary.percentiles["p50"] == pytest.approx(statistics.median(strength))
+
+        histogram = aggregates.histograms["strength"]
+        assert all(bucket.start % 25 == 0 for bucket in histogram)
+        assert sum(bucket.count for bucket in histogram) == len(strength)
+
+    async def test_get_aggregates_empty(self, router_client: httpx.AsyncClient):
+        """Агрегаты для фильтра без подходящих героев."""
+
+        response = await router_client.get(
+            url="/heroes/aggregates", params={"publisher": "Nonexistent"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        aggregates = HeroAggregatesReadSchema(**response.json())
+
+        assert aggregates.count == 0
+        summary = aggregates.powerstats["strength"]
+        assert (summary.count, summary.min, summary.avg) == (0, None, None)
+        assert summary.percentiles == {
+            "p25": None,
+            "p50": None,
+            "p75": None,
+            "p90": None,
+        }
+        assert all(not buckets for buckets in aggregates.facets.values())
+        assert all(not buckets for buckets in aggregates.histograms.values())
+
+    # MARK: Export
+    async def test_export_heroes_ndjson(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно выгрузить героев с фильтрацией в формате NDJSON."""
+
+        response = await router_client.get(
+            url="/heroes/export", params={"strength_min": 50}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        heroes = [
+            HeroReadSchema.model_validate_json(line)
+            for line in response.text.splitlines()
+        ]
+        assert len(heroes) == await HeroDAO.count(
+            HeroModel.strength >= 50, session=session
+        )
+        assert [hero.id for hero in heroes] == sorted(hero.id for hero in heroes)
+
+    async def test_export_heroes_csv(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно выгрузить всех героев в формате CSV."""
+
+        response = await router_client.get(
+            url="/heroes/export", params={"format": "csv"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == await HeroDAO.count(session=session)
+        assert json.loads(rows[0]["powerstats"]).keys() == set(
+            HeroPowerStatsSchema.model_fields
+        )
+
     # MARK: Post
     async def test_create_hero(
         self, session: AsyncSession, router_client: httpx.AsyncClient, mocker
@@ -78,11 +623,93 @@ class TestHeroesRouter(BaseTestRouter):
             return_value=[hero_data],
         )
 
+        generation = heroes_cache.generation
+
         response = await router_client.post(url="/heroes", params={"name": "Batman"})
         assert response.status_code == status.HTTP_201_CREATED
 
+        # Добавление героев инвалидирует кеш списков
+        assert heroes_cache.generation == generation + 1
+
         heroes_data = HeroListReadSchema(**response.json())
         assert heroes_data.count == 1
 
         assert heroes_data.heroes[0].name == "Batman"
         assert heroes_data.heroes[0].id == 69
+
+    # MARK: Import
+    async def test_import_heroes(
+        self, session: AsyncSession, router_client: httpx.AsyncClient
+    ):
+        """Возможно загрузить героев в формате NDJSON, некорректные записи пропускаются."""
+
+        heroes = [
+            HeroReadSchema.model_validate(hero).model_dump(mode="json", by_alias=True)
+            for hero in await HeroDAO.find_all_sorted(
+                session=session, order_by=HeroModel.id, offset=0, limit=2, asc=True
+            )
+        ]
+        heroes[0]["name"] = 'O\'Neil "The Hero"'
+        heroes[1]["id"] = 100_000
+        content = "\n".join([json.dumps(hero) for hero in heroes] + ["{}", "not json"])
+
+        response = await router_client.post(
+            url="/heroes/import",
+            params={"format": "ndjson", "on_conflict": "update"},
+            content=content,
+            headers={"X-Admin-Token": api_settings.ADMIN_TOKEN},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        report = HeroImportReadSchema(**response.json())
+        assert report.rows == 4
+        assert report.invalid == len(report.errors) == 2
+        assert (report.inserted, report.updated, report.skipped) == (1, 1, 0)
+
+        hero = await session.get(HeroModel, heroes[0]["id"], populate_existing=True)
+        assert hero.name == 'O\'Neil "The Hero"'
+
+    async def test_import_heroes_fixture_format(self, router_client: httpx.AsyncClient):
+        """Возможно загрузить героев в формате фикстуры `alembic/fixtures/heroes.json`."""
+
+        response = await router_client.post(
+            url="/heroes/import",
+            params={"format": "json"},
+            content=HEROES_FIXTURE_PATH.read_bytes(),
+            headers={"X-Admin-Token": api_settings.ADMIN_TOKEN},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        report = HeroImportReadSchema(**response.json())
+        assert report.invalid == 0
+        assert report.skipped == report.rows > 0
+
+    async def test_import_heroes_invalid_json(
+        self, router_client: httpx.AsyncClient, mocker
+    ):
+        """Синтаксическая ошибка в JSON и слишком большая запись отклоняются."""
+
+        for content in ('[{"id": 1}, {"id": 2,, "name": "x"}]', '[{"id": 1}'):
+            response = await router_client.post(
+                url="/heroes/import",
+                params={"format": "json"},
+                content=content,
+                headers={"X-Admin-Token": api_settings.ADMIN_TOKEN},
+            )
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        mocker.patch.object(api_constants, "HEROES_IMPORT_MAX_RECORD_SIZE", 100)
+        for format in ("json", "ndjson"):
+            response = await router_client.post(
+                url="/heroes/import",
+                params={"format": format},
+                content='[{"name": "' + "x" * 200,
+                headers={"X-Admin-Token": api_settings.ADMIN_TOKEN},
+            )
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_import_heroes_forbidden(self, router_client: httpx.AsyncClient):
+        """Загрузка героев без токена администратора запрещена."""
+
+        response = await router_client.post(url="/heroes/import", content="")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
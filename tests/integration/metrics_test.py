@@ -0,0 +1,70 @@
+from collections import Counter
+
+import httpx
+from fastapi import FastAPI, status
+
+from src import metrics
+from src.dependencies import get_read_session, get_session
+from src.heroes.router import heroes_router
+from src.heroes.service import HeroesService, heroes_cache
+
+
+class TestMetrics:
+    """Класс для тестирования метрик API."""
+
+    async def test_request_metrics(self, session, superhero_api_stub: Counter):
+        """Запросы учитываются по шаблону маршрута, запросам к БД и SuperHero API."""
+
+        for histogram in metrics.HISTOGRAMS:
+            histogram.reset()
+        heroes_cache.invalidate()
+
+        app = FastAPI()
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.include_router(heroes_router)
+        app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_read_session] = lambda: session
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get(url="/heroes/batch", params={"ids": [69, 70]})
+            assert response.status_code == status.HTTP_200_OK
+            response = await client.get(url="/heroes/batch", params={"ids": [71]})
+            assert response.status_code == status.HTTP_200_OK
+            response = await client.get(url="/unknown")
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+        await HeroesService._fetch_from_superhero_api(name="Batman")
+
+        output = metrics.render_metrics(gauges={"heroes_cache": heroes_cache.stats()})
+        # Разные id - один маршрут и один нормализованный запрос к БД
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/heroes/batch",status="200"} 2'
+        ) in output
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="unmatched",status="404"} 1'
+        ) in output
+        statements = [
+            labels[0]
+            for labels in metrics.db_statement_duration._series
+            if "ANY" in labels[0]
+        ]
+        assert len(statements) == 1
+        db_series = metrics.http_request_db_duration._series
+        assert db_series[("GET", "/heroes/batch", "200")][-2] > 0
+        assert (
+            'superhero_api_request_duration_seconds_count{operation="search",'
+            'status="200"} 1'
+        ) in output
+        assert "# TYPE heroes_cache_hits gauge" in output
+
+    def test_normalize_statement(self):
+        """Параметры, литералы и списки параметров заменяются на `?`."""
+
+        statement = metrics.normalize_statement(
+            "SELECT id FROM heroes\n WHERE id IN ($1, $2, $3) AND name = 'Batman' LIMIT 10"
+        )
+        assert statement == "SELECT id FROM heroes WHERE id IN (?) AND name = ? LIMIT ?"
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import api_settings
+from src.pool import InstrumentedAsyncQueuePool
+
+
+class TestInstrumentedPool:
+    """Класс для тестирования метрик пула соединений."""
+
+    async def test_pool_metrics(self):
+        """Пул учитывает ожидание, нехватку и открытие соединений."""
+
+        engine = create_async_engine(
+            url=api_settings.DATABASE_URL,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.5,
+        )
+        pool = engine.pool
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+                async def wait_for_connection():
+                    async with engine.connect() as other:
+                        await other.execute(text("SELECT 1"))
+
+                # Второе соединение ждет, пока первое вернется в пул
+                waiter = asyncio.create_task(wait_for_connection())
+                await asyncio.sleep(0.1)
+                assert pool.stats()["checked_out"] == 1
+
+            await waiter
+            stats = pool.stats()
+            assert stats["checkouts"] == 2
+            assert stats["connects"] == 1
+            assert stats["checked_out_max"] == 1
+            assert stats["checkout_wait_max"] >= 0.05
+
+            async with engine.connect():
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+            assert pool.stats()["checkout_timeouts"] == 1
+
+            # Метрики переживают пересоздание пула и не учитываются дважды
+            await engine.dispose()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            stats = engine.pool.stats()
+            assert stats["connects"] == 2
+            assert stats["closes"] == 1
+        finally:
+            await engine.dispose()
@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+
+from src import api_constants
+from src.config import api_settings
+from src.database import create_engine, server_settings
+
+# В контейнере тестов запросы идут через `pgbouncer-test`,
+# локально без PgBouncer - напрямую в Postgres
+PGBOUNCER_URL = os.getenv("PGBOUNCER_URL", api_settings.DATABASE_URL)
+
+
+class TestPoolerMode:
+    """Класс для тестирования подключения через PgBouncer."""
+
+    async def test_concurrent_prepared_statements(self):
+        """Параллельные транзакции не конфликтуют из-за подготовленных запросов."""
+
+        engine = create_engine(url=PGBOUNCER_URL, pooler_mode=True, app_pool="null")
+
+        async def run_transactions(worker: int) -> list[int]:
+            results = []
+            for i in range(5):
+                async with engine.connect() as conn:
+                    # Разные тексты запросов и параметры в каждой транзакции
+                    result = await conn.execute(
+                        text(f"SELECT CAST(:value AS integer) + {i}"),
+                        {"value": worker},
+                    )
+                    results.append(result.scalar_one())
+            return results
+
+        try:
+            results = await asyncio.gather(*(run_transactions(w) for w in range(20)))
+            assert results == [[w + i for i in range(5)] for w in range(20)]
+
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                names = (
+                    await conn.execute(text("SELECT name FROM pg_prepared_statements"))
+                ).scalars()
+                # Имена по умолчанию `__asyncpg_stmt_N__` совпадают у разных клиентов
+                assert not [name for name in names if name.startswith("__asyncpg_stmt")]
+                application_name = await conn.scalar(
+                    text("SELECT current_setting('application_name')")
+                )
+                assert application_name == api_constants.DB_APPLICATION_NAME
+        finally:
+            await engine.dispose()
+
+    def test_unsupported_server_settings(self, monkeypatch):
+        """В режиме пулера параметры сессии, отклоняемые PgBouncer, недопустимы."""
+
+        monkeypatch.setattr(
+            api_settings, "DB_SERVER_SETTINGS", {"jit": "off", "TimeZone": "UTC"}
+        )
+
+        assert server_settings(pooler_mode=False)["jit"] == "off"
+        with pytest.raises(ValueError, match="jit"):
+            server_settings(pooler_mode=True)
+
+        monkeypatch.setattr(api_settings, "DB_SERVER_SETTINGS", {"TimeZone": "UTC"})
+        assert server_settings(pooler_mode=True) == {
+            "application_name": api_constants.DB_APPLICATION_NAME,
+            "TimeZone": "UTC",
+        }
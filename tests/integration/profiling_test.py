@@ -0,0 +1,114 @@
+import logging
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import Message, Receive, Scope, Send
+
+from src.config import api_settings
+from src.dependencies import get_session
+from src.profiling import ProfilingMiddleware
+
+
+def busy_loop(seconds: float) -> None:
+    """Нагрузить CPU на `seconds` секунд."""
+
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfiling:
+    """Класс для тестирования профилирования запросов."""
+
+    @staticmethod
+    def create_client(session: AsyncSession) -> httpx.AsyncClient:
+        app = FastAPI()
+        app.add_middleware(ProfilingMiddleware)
+        app.dependency_overrides[get_session] = lambda: session
+
+        @app.get("/work")
+        async def work(session: AsyncSession = Depends(get_session)) -> dict:
+            await session.execute(text("SELECT pg_sleep(0.05)"))
+            busy_loop(0.05)
+            return {}
+
+        transport = httpx.ASGITransport(app=app)
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    async def test_profile_request(self, session, mocker, tmp_path):
+        """Профиль сохраняется в виде свернутых стеков, время БД и CPU разделены."""
+
+        mocker.patch.object(api_settings, "PROFILING_DIR", str(tmp_path))
+        async with self.create_client(session) as client:
+            response = await client.get("/work")
+            assert "x-profile-id" not in response.headers
+
+            response = await client.get("/work", params={"profile": 1})
+
+        profile_id = response.headers["x-profile-id"]
+        timings = dict(
+            item.strip().split(";dur=")
+            for item in response.headers["server-timing"].split(",")
+        )
+        assert float(timings["db"]) >= 50
+        assert float(timings["cpu"]) >= 40
+        assert float(timings["total"]) >= float(timings["db"]) + 40
+
+        folded = (tmp_path / f"{profile_id}.folded").read_text()
+        assert "busy_loop" in folded
+        for line in folded.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert stack and int(count) > 0
+
+    async def test_profile_requires_admin_token(self, session, mocker, tmp_path):
+        """Вне режимов LOCAL и TEST профилирование доступно только администратору."""
+
+        mocker.patch.object(api_settings, "PROFILING_DIR", str(tmp_path))
+        mocker.patch.object(api_settings, "MODE", "DEV")
+        async with self.create_client(session) as client:
+            response = await client.get("/work", headers={"X-Profile": "1"})
+            assert "x-profile-id" not in response.headers
+
+            response = await client.get(
+                "/work",
+                headers={"X-Profile": "1", "X-Admin-Token": api_settings.ADMIN_TOKEN},
+            )
+            assert "x-profile-id" in response.headers
+
+    async def test_profile_streaming_response(self, mocker, tmp_path, caplog):
+        """Части потокового ответа передаются без задержки, сводка - в журнал."""
+
+        mocker.patch.object(api_settings, "PROFILING_DIR", str(tmp_path))
+        caplog.set_level(logging.INFO, logger="src.profiling")
+        sent: list[Message] = []
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"1", "more_body": True})
+            # Первая часть передана клиенту до завершения обработки
+            assert [message["type"] for message in sent] == [
+                "http.response.start",
+                "http.response.body",
+            ]
+            await send({"type": "http.response.body", "body": b"2"})
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "path": "/export",
+            "headers": [(b"x-profile", b"1")],
+            "query_string": b"",
+        }
+        await ProfilingMiddleware(app)(scope, None, send)
+
+        headers = dict(sent[0]["headers"])
+        assert b"server-timing" not in headers
+        profile_id = headers[b"x-profile-id"].decode()
+        assert [message.get("body") for message in sent[1:]] == [b"1", b"2"]
+        assert (tmp_path / f"{profile_id}.folded").exists()
+        assert any(profile_id in record.getMessage() for record in caplog.records)
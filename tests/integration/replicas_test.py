@@ -0,0 +1,115 @@
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.database import SessionLocal
+from src.replicas import Replica, ReplicaSet
+from tests.integration.conftest import REPLICA_URL
+
+
+class TestReplicaSet:
+    """Класс для тестирования маршрутизации чтения на реплики."""
+
+    async def test_round_robin(self):
+        """Реплики выбираются по очереди, запросы выполняются на реплике."""
+
+        replicas = ReplicaSet(urls=[REPLICA_URL, REPLICA_URL], primary=SessionLocal)
+        try:
+            selected = [await replicas.select() for _ in range(4)]
+            assert selected == replicas.replicas * 2
+
+            async with replicas.session() as session:
+                assert session.bind is replicas.replicas[0].engine
+                assert await session.scalar(text("SELECT count(*) FROM heroes")) > 0
+            assert replicas.replicas[0].lag is not None
+        finally:
+            await replicas.dispose()
+
+    async def test_least_conn(self):
+        """Выбирается реплика с наименьшим числом открытых сессий."""
+
+        replicas = ReplicaSet(
+            urls=[REPLICA_URL, REPLICA_URL],
+            primary=SessionLocal,
+            selection="least_conn",
+        )
+        first, second = replicas.replicas
+        try:
+            async with replicas.session():
+                assert first.in_flight == 1
+                async with replicas.session():
+                    assert second.in_flight == 1
+                    assert await replicas.select() is first
+            assert first.in_flight == second.in_flight == 0
+        finally:
+            await replicas.dispose()
+
+    async def test_read_after_write(self, mocker):
+        """После записи чтение переключается на основную БД на время отставания."""
+
+        replicas = ReplicaSet(
+            urls=[REPLICA_URL], primary=SessionLocal, max_lag=5.0, check_interval=1.0
+        )
+        (replica,) = replicas.replicas
+        mocker.patch.object(replica, "measure_lag", return_value=0.0)
+        try:
+            async with replicas.session() as before_write:
+                assert before_write.bind is replica.engine
+                replicas.mark_write()
+                # Сессия реплики открыта до записи и могла ее не получить
+                assert not replicas.is_fresh(before_write)
+
+            async with replicas.session() as session:
+                assert session.bind is SessionLocal.kw["bind"]
+                assert replicas.is_fresh(session)
+            # Чтение в окне после записи учитывается отдельно от недоступности реплик
+            assert replicas.stats()["primary_after_write"] == 1
+            assert replicas.stats()["primary_fallbacks"] == 0
+
+            replicas.last_write_at -= replicas.max_lag + replicas.check_interval
+            async with replicas.session() as session:
+                assert session.bind is replica.engine
+                assert replicas.is_fresh(session)
+        finally:
+            await replicas.dispose()
+
+    async def test_wal_receiver_down(self, mocker):
+        """Реплика без потоковой репликации недоступна, даже если WAL применены."""
+
+        replicas = ReplicaSet(urls=[REPLICA_URL], primary=SessionLocal)
+        (replica,) = replicas.replicas
+        # Реплика в режиме восстановления, WAL receiver отключен
+        mocker.patch(
+            "src.replicas.REPLICATION_STATE_SQL",
+            text("SELECT true, false, true, 0.5::float"),
+        )
+        try:
+            assert await replica.measure_lag() is None
+            async with replicas.session() as session:
+                assert session.bind is SessionLocal.kw["bind"]
+            assert replica.lag is None
+        finally:
+            await replicas.dispose()
+
+        assert Replica.replication_lag(True, True, True, 30.0) == 0.0
+        assert Replica.replication_lag(True, True, False, 3.0) == 3.0
+        assert Replica.replication_lag(False, False, True, None) == 0.0
+
+    async def test_primary_fallback(self, mocker):
+        """Отстающие и недоступные реплики пропускаются в пользу основной БД."""
+
+        unavailable_url = (
+            make_url(REPLICA_URL).set(port=1).render_as_string(hide_password=False)
+        )
+        replicas = ReplicaSet(
+            urls=[REPLICA_URL, unavailable_url], primary=SessionLocal, max_lag=5.0
+        )
+        lagging, unavailable = replicas.replicas
+        mocker.patch.object(lagging, "measure_lag", return_value=10.0)
+        try:
+            async with replicas.session() as session:
+                assert session.bind is SessionLocal.kw["bind"]
+            assert lagging.lag == 10.0
+            assert unavailable.lag is None
+            assert replicas.stats()["primary_fallbacks"] == 1
+        finally:
+            await replicas.dispose()
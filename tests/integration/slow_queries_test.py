@@ -0,0 +1,72 @@
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import api_settings
+from src.database import create_engine
+from src.heroes.dao import HeroDAO
+from src.heroes.models import HeroModel
+from src.slow_queries import SlowQueryLog, explain_options, parameters_shape
+
+
+class TestSlowQueryLog:
+    """Класс для тестирования журнала медленных запросов."""
+
+    async def test_slow_query_explain(self, caplog):
+        """Медленные запросы DAO записываются в журнал с планом `EXPLAIN`."""
+
+        engine = create_engine(url=api_settings.DATABASE_URL)
+        slow_log = SlowQueryLog(
+            threshold=0.0,
+            log_per_minute=2,
+            explain_sample_rate=1.0,
+            explain_per_minute=1,
+        )
+        slow_log.instrument(engine)
+        caplog.set_level(logging.WARNING, logger="src.slow_queries")
+        try:
+            async with AsyncSession(bind=engine) as session:
+                count = await HeroDAO.count(HeroModel.name == "Batman", session=session)
+                assert count > 0
+                await session.execute(select(HeroModel.id).limit(1))
+                # Лимит записей исчерпан
+                await session.execute(text("SELECT 1"))
+            await slow_log.wait()
+        finally:
+            await engine.dispose()
+
+        messages = [record.getMessage() for record in caplog.records]
+        slow = [message for message in messages if message.startswith("Медленный")]
+        plans = [message for message in messages if message.startswith("План")]
+        assert len(slow) == 2
+        assert "параметры: (str)" in slow[0]
+        # `EXPLAIN` выполнен только для первого запроса по лимиту в минуту
+        assert len(plans) == 1
+        assert "actual time" in plans[0]
+        assert slow_log.log_limiter.suppressed == 1
+
+    def test_explain_options(self):
+        """`EXPLAIN ANALYZE` только для запросов без функций с побочными эффектами."""
+
+        analyze = "(ANALYZE, BUFFERS) "
+        assert (
+            explain_options(
+                "SELECT count(*) FROM heroes WHERE heroes.id = ANY ($1::INTEGER[]) "
+                "AND (heroes.name, heroes.id) > ($2, $3)"
+            )
+            == analyze
+        )
+        assert (
+            explain_options("SELECT pg_advisory_xact_lock(hashtextextended($1, 0))")
+            is None
+        )
+        assert explain_options("SELECT setval('heroes_id_seq', $1)") == ""
+        assert explain_options("SELECT random() FROM heroes") == ""
+        assert explain_options("INSERT INTO heroes (id) VALUES ($1)") is None
+
+    def test_parameters_shape(self):
+        """В журнал попадают типы параметров без значений."""
+
+        assert parameters_shape(("Batman", 10, [1, 2, 3])) == "(str, int, list[3])"
+        assert parameters_shape({"name": "Batman"}) == "{name: str}"
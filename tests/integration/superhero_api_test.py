@@ -0,0 +1,241 @@
+import asyncio
+from collections import Counter
+from contextlib import nullcontext
+
+import httpx
+import pytest
+from fastapi import status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import exceptions
+from src.config import api_settings
+from src.heroes.models import HeroModel
+from src.heroes.router import heroes_router
+from src.heroes.schemas import (
+    HeroBatchCreateReadSchema,
+    HeroCreateReadSchema,
+    HeroListReadSchema,
+)
+from src.heroes.service import HeroesService, upstream_cache
+from tests.integration.conftest import BaseTestRouter
+
+
+class TestSuperHeroAPI(BaseTestRouter):
+    """
+    Класс для тестирования взаимодействия с сервисом SuperHero API.
+
+    Запросы выполняются к локальному stub сервиса `superhero_api_stub`.
+    """
+
+    router = heroes_router
+
+    async def test_fetch_from_superhero_api(self, superhero_api_stub: Counter):
+        """Возможно получить данные героев из сервиса, повторный поиск кешируется."""
+
+        heroes = await HeroesService._fetch_from_superhero_api(name="Batman")
+        assert {hero["id"] for hero in heroes} == {"69", "70", "71"}
+
+        await HeroesService._fetch_from_superhero_api(name=" batman")
+        assert superhero_api_stub["search"] == 1
+
+    async def test_fetch_from_superhero_api_not_found_cached(
+        self, superhero_api_stub: Counter
+    ):
+        """Ответ "герой не найден" кешируется."""
+
+        for _ in range(2):
+            with pytest.raises(exceptions.HeroNotFound):
+                await HeroesService._fetch_from_superhero_api(name="Nobody")
+        assert superhero_api_stub["search"] == 1
+
+    async def test_fetch_from_superhero_api_persistent_cache(
+        self, session: AsyncSession, superhero_api_stub: Counter, mocker
+    ):
+        """Результаты поиска сохраняются в БД и переживают сброс кеша в памяти."""
+
+        mocker.patch.object(api_settings, "SUPERHERO_API_CACHE_PERSISTENT", True)
+        mocker.patch(
+            "src.heroes.service.SessionLocal", return_value=nullcontext(session)
+        )
+
+        await HeroesService._fetch_from_superhero_api(name="Batman")
+        upstream_cache.invalidate()
+        heroes = await HeroesService._fetch_from_superhero_api(name="Batman")
+
+        assert {hero["id"] for hero in heroes} == {"69", "70", "71"}
+        assert superhero_api_stub["search"] == 1
+
+    async def test_create_hero_from_superhero_api(
+        self,
+        session: AsyncSession,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+    ):
+        """Возможно добавить героев, найденных в сервисе SuperHero API."""
+
+        await session.execute(
+            delete(HeroModel).where(HeroModel.name.startswith("Batman"))
+        )
+
+        response = await router_client.post(url="/heroes", params={"name": "Batman"})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        heroes_data = HeroListReadSchema(**response.json())
+        assert {hero.id for hero in heroes_data.heroes} == {69, 70, 71}
+
+    async def test_create_hero_on_conflict(
+        self,
+        session: AsyncSession,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+    ):
+        """Возможно добавить героев, пропуская или обновляя уже существующих."""
+
+        await session.execute(delete(HeroModel).where(HeroModel.id == 69))
+
+        response = await router_client.post(
+            url="/heroes", params={"name": "Batman", "on_conflict": "ignore"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        heroes_data = HeroCreateReadSchema(**response.json())
+        assert heroes_data.inserted == [69]
+        assert heroes_data.skipped == [70, 71]
+        assert [hero.id for hero in heroes_data.heroes] == [69]
+        assert superhero_api_stub["search"] == 1
+
+        # Обновление запрашивает актуальные данные в сервисе, а не из кеша
+        for _ in range(2):
+            response = await router_client.post(
+                url="/heroes", params={"name": "Batman", "on_conflict": "update"}
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+            heroes_data = HeroCreateReadSchema(**response.json())
+            assert heroes_data.inserted == []
+            assert sorted(heroes_data.updated) == [69, 70, 71]
+            assert heroes_data.count == 3
+        assert superhero_api_stub["search"] == 3
+
+    async def test_create_hero_incomplete_response(
+        self, router_client: httpx.AsyncClient, mocker
+    ):
+        """Ответ SuperHero API без полей героя считается недоступностью сервиса."""
+
+        mocker.patch.object(
+            HeroesService,
+            "_fetch_from_superhero_api",
+            return_value=[{"id": "100000", "name": "Batman"}],
+        )
+        response = await router_client.post(url="/heroes", params={"name": "Batman"})
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    async def test_create_hero_not_found(
+        self, router_client: httpx.AsyncClient, superhero_api_stub: Counter
+    ):
+        """Герой, неизвестный сервису SuperHero API, не добавляется."""
+
+        response = await router_client.post(url="/heroes", params={"name": "Nobody"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_create_hero_concurrent(
+        self,
+        session: AsyncSession,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+    ):
+        """Одновременные запросы на создание героя объединяются в один."""
+
+        await session.execute(
+            delete(HeroModel).where(HeroModel.name.startswith("Batman"))
+        )
+
+        responses = await asyncio.gather(
+            *(
+                router_client.post(url="/heroes", params={"name": name})
+                for name in ("Batman", "batman", " Batman")
+            )
+        )
+        assert all(r.status_code == status.HTTP_201_CREATED for r in responses)
+        assert len({r.content for r in responses}) == 1
+        assert superhero_api_stub["search"] == 1
+
+    async def test_create_hero_advisory_lock(
+        self,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+        mocker,
+    ):
+        """В режиме advisory-блокировки существующий герой не запрашивается в сервисе."""
+
+        mocker.patch.object(api_settings, "HEROES_CREATE_LOCK", "advisory")
+
+        for name in ("Batman", "batman", " BATMAN "):
+            response = await router_client.post(url="/heroes", params={"name": name})
+            assert response.status_code == status.HTTP_409_CONFLICT
+        assert superhero_api_stub["search"] == 0
+
+    async def test_create_heroes_batch(
+        self,
+        session: AsyncSession,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+    ):
+        """Возможно создать героев по списку имен одним запросом."""
+
+        await session.execute(
+            delete(HeroModel).where(HeroModel.name.startswith("Batman"))
+        )
+
+        response = await router_client.post(
+            url="/heroes/batch",
+            json={"names": ["Batman", "Nobody", " batman", "Spider-Man"]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        batch = HeroBatchCreateReadSchema(**response.json())
+        assert [(r.name, r.status) for r in batch.results] == [
+            ("Batman", "created"),
+            ("Nobody", "not_found"),
+            ("batman", "created"),
+            ("Spider-Man", "exists"),
+        ]
+        assert batch.results[0].ids == batch.results[2].ids == [69, 70, 71]
+        assert sorted(batch.inserted) == [69, 70, 71]
+        assert sorted(batch.skipped) == [620, 621, 622]
+        # Повторяющиеся имена запрашиваются в сервисе один раз
+        assert superhero_api_stub["search"] == 3
+
+    async def test_create_heroes_batch_errors(
+        self,
+        router_client: httpx.AsyncClient,
+        superhero_api_stub: Counter,
+        mocker,
+    ):
+        """Пустые имена отклоняются, ошибка обработки одного имени не прерывает пакет."""
+
+        response = await router_client.post(
+            url="/heroes/batch", json={"names": ["Batman", "  "]}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert superhero_api_stub["search"] == 0
+
+        prepare_heroes_data = HeroesService._prepare_heroes_data
+
+        def prepare_or_fail(results: list[dict]) -> list[dict]:
+            if any(hero["name"] == "Spider-Man" for hero in results):
+                raise KeyError("powerstats")
+            return prepare_heroes_data(results)
+
+        mocker.patch.object(
+            HeroesService, "_prepare_heroes_data", side_effect=prepare_or_fail
+        )
+        response = await router_client.post(
+            url="/heroes/batch",
+            json={"names": ["Spider-Man", "Batman"], "on_conflict": "update"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        batch = HeroBatchCreateReadSchema(**response.json())
+        assert [(r.name, r.status) for r in batch.results] == [
+            ("Spider-Man", "error"),
+            ("Batman", "created"),
+        ]